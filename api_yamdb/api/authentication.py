@@ -0,0 +1,39 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from reviews.versions import get_token_version
+
+CLAIMS = ("username", "role", "is_staff", "is_superuser", "ver")
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """Собирает пользователя из утверждений токена без запроса к базе.
+
+    Токен сверяется только с версией токенов пользователя, которая
+    хранится в кэше. Токены без нужных утверждений обрабатываются как
+    обычно, с загрузкой пользователя.
+    """
+
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim in CLAIMS):
+            return super().get_user(validated_token)
+
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        if get_token_version(user_id) != validated_token["ver"]:
+            raise AuthenticationFailed(
+                "Токен отозван.", code="token_revoked"
+            )
+        user = self.user_model(
+            **{api_settings.USER_ID_FIELD: user_id},
+            username=validated_token["username"],
+            role=validated_token["role"],
+            is_staff=validated_token["is_staff"],
+            is_superuser=validated_token["is_superuser"],
+            is_active=True,
+            token_version=validated_token["ver"],
+        )
+        # Объект соответствует строке в базе, но загружен не полностью:
+        # его нельзя сохранять, только ссылаться на него.
+        user._state.adding = False
+        return user
@@ -0,0 +1,333 @@
+import random
+import time
+from math import ceil
+from statistics import mean, median
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from reviews.leaderboards import rebuild_all
+from reviews.models import Category, Comment, CustomUser, Genre, Review, Title
+from reviews.ratings import recalculate_scores, recount_comments
+from .cache import response_cache
+from .tokens import get_jwt_token
+
+
+def seed_dataset(titles=200, reviews_per_title=20, comments_per_review=2,
+                 seed=0):
+    """Заполняет базу тестовыми данными, возвращает размер набора."""
+    rng = random.Random(seed)
+    users = max(reviews_per_title, 1) + 1
+    Category.objects.bulk_create(
+        Category(name=f"Категория {i}", slug=f"category-{i}")
+        for i in range(5)
+    )
+    Genre.objects.bulk_create(
+        Genre(name=f"Жанр {i}", slug=f"genre-{i}") for i in range(15)
+    )
+    category_ids = list(Category.objects.values_list("id", flat=True))
+    genre_ids = list(Genre.objects.values_list("id", flat=True))
+    CustomUser.objects.bulk_create(
+        CustomUser(
+            username=f"bench{i}",
+            email=f"bench{i}@yamdb.fake",
+            confirmation_code="bench",
+        )
+        for i in range(users)
+    )
+    CustomUser.objects.create_user(
+        username="bench-admin", email="bench-admin@yamdb.fake", role="admin"
+    )
+    user_ids = list(
+        CustomUser.objects.filter(username__startswith="bench")
+        .exclude(username="bench-admin")
+        .values_list("id", flat=True)
+    )
+    Title.objects.bulk_create(
+        Title(
+            name=f"Произведение {i}",
+            year=rng.randint(1950, 2020),
+            description=f"Описание произведения {i}",
+            category_id=rng.choice(category_ids),
+        )
+        for i in range(titles)
+    )
+    title_ids = list(Title.objects.values_list("id", flat=True))
+    through = Title.genre.through
+    through.objects.bulk_create(
+        through(title_id=title_id, genre_id=genre_id)
+        for title_id in title_ids
+        for genre_id in rng.sample(genre_ids, 2)
+    )
+    Review.objects.bulk_create(
+        Review(
+            title_id=title_id,
+            author_id=author_id,
+            text="Текст отзыва",
+            score=rng.randint(1, 10),
+        )
+        for title_id in title_ids
+        for author_id in rng.sample(user_ids, reviews_per_title)
+    )
+    review_ids = list(Review.objects.values_list("id", flat=True))
+    Comment.objects.bulk_create(
+        Comment(
+            review_id=review_id,
+            author_id=rng.choice(user_ids),
+            text="Текст комментария",
+        )
+        for review_id in review_ids
+        for _ in range(comments_per_review)
+    )
+    recalculate_scores()
+    recount_comments()
+    rebuild_all()
+    return {
+        "titles": len(title_ids),
+        "reviews": len(review_ids),
+        "comments": len(review_ids) * comments_per_review,
+        "users": users + 1,
+    }
+
+
+def token_client(user=None):
+    client = APIClient()
+    if user is not None:
+        token = get_jwt_token(user)["token"]
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    return client
+
+
+def build_endpoints():
+    """Запросы ко всем маршрутам и методам api/urls.py, кроме PUT,
+    на засеянных данных.
+
+    Возвращает список (имя, клиент, метод, функция i -> (url, data)).
+    Объекты для удаления создаются в функции запроса, до замера;
+    свои отзывы и комментарии изменяют их авторы.
+    """
+    admin = CustomUser.objects.get(username="bench-admin")
+    user = CustomUser.objects.filter(username__startswith="bench").first()
+    anonymous, user_client, admin_client = (
+        token_client(), token_client(user), token_client(admin)
+    )
+    title = Title.objects.order_by("-reviews_count", "id").first()
+    review = title.reviews.order_by("id").first()
+    comment = review.comments.order_by("id").first()
+    genre = Genre.objects.first()
+    category = Category.objects.first()
+    # Для записи отзывов нужны произведения, где у автора ещё нет отзыва.
+    free_titles = list(
+        Title.objects.exclude(reviews__author=admin)
+        .values_list("id", flat=True)
+    )
+    title_url = f"/api/v1/titles/{title.id}/"
+    reviews_url = f"{title_url}reviews/"
+    comments_url = f"{reviews_url}{review.id}/comments/"
+
+    def get(url):
+        return lambda i: (url, None)
+
+    def delete_title(i):
+        pk = Title.objects.create(name=f"Удаляемое {i}", year=2000).pk
+        return f"/api/v1/titles/{pk}/", None
+
+    def delete_review(i):
+        author = CustomUser.objects.create(
+            username=f"review-author{i}", email=f"review{i}@yamdb.fake"
+        )
+        pk = Review.objects.create(
+            title=title, author=author, text="Отзыв", score=5
+        ).pk
+        return f"{reviews_url}{pk}/", None
+
+    def delete_comment(i):
+        pk = Comment.objects.create(
+            review=review, author=user, text="Комментарий"
+        ).pk
+        return f"{comments_url}{pk}/", None
+
+    def delete_slug(model, resource):
+        def request(i):
+            slug = model.objects.create(
+                name=f"Удаляемый {i}", slug=f"delete-{resource}-{i}"
+            ).slug
+            return f"/api/v1/{resource}/{slug}/", None
+        return request
+
+    def delete_user(i):
+        username = CustomUser.objects.create(
+            username=f"deleted{i}", email=f"deleted{i}@yamdb.fake"
+        ).username
+        return f"/api/v1/users/{username}/", None
+
+    return [
+        ("titles-list", anonymous, "get", get("/api/v1/titles/")),
+        ("titles-list-100", anonymous, "get",
+         get("/api/v1/titles/?limit=100")),
+        ("titles-list-deep-offset", anonymous, "get",
+         get(f"/api/v1/titles/?offset={max(Title.objects.count() - 10, 0)}")),
+        ("titles-list-cursor", anonymous, "get",
+         get("/api/v1/titles/?pagination=cursor")),
+        ("titles-filter-genre", anonymous, "get",
+         get(f"/api/v1/titles/?genre={genre.slug}")),
+        ("titles-filter-category", anonymous, "get",
+         get(f"/api/v1/titles/?category={category.slug}")),
+        ("titles-search", anonymous, "get",
+         get("/api/v1/titles/?name=Произведение")),
+        ("titles-top", anonymous, "get", get("/api/v1/titles/top/")),
+        ("titles-top-category", anonymous, "get",
+         get(f"/api/v1/titles/top/category/{category.slug}/")),
+        ("titles-top-genre", anonymous, "get",
+         get(f"/api/v1/titles/top/genre/{genre.slug}/")),
+        ("titles-detail", anonymous, "get", get(title_url)),
+        ("titles-summary", anonymous, "get", get(f"{title_url}summary/")),
+        ("titles-create", admin_client, "post",
+         lambda i: ("/api/v1/titles/", {
+             "name": f"Новое {i}", "year": 2000,
+             "genre": [genre.slug], "category": category.slug,
+         })),
+        ("titles-update", admin_client, "patch",
+         lambda i: (title_url, {"description": f"Описание {i}"})),
+        ("titles-delete", admin_client, "delete", delete_title),
+        ("titles-bulk", admin_client, "post",
+         lambda i: ("/api/v1/titles/bulk/", [
+             {"name": f"Пакет {i}-{j}", "year": 2000,
+              "genre": [genre.slug], "category": category.slug}
+             for j in range(10)
+         ])),
+        ("genres-list", anonymous, "get", get("/api/v1/genres/")),
+        ("genres-create", admin_client, "post",
+         lambda i: ("/api/v1/genres/", {
+             "name": f"Жанр {i}", "slug": f"new-genre-{i}"
+         })),
+        ("genres-delete", admin_client, "delete",
+         delete_slug(Genre, "genres")),
+        ("categories-list", anonymous, "get", get("/api/v1/categories/")),
+        ("categories-create", admin_client, "post",
+         lambda i: ("/api/v1/categories/", {
+             "name": f"Категория {i}", "slug": f"new-category-{i}"
+         })),
+        ("categories-delete", admin_client, "delete",
+         delete_slug(Category, "categories")),
+        ("reviews-list", anonymous, "get", get(reviews_url)),
+        ("reviews-list-100", anonymous, "get",
+         get(f"{reviews_url}?limit=100")),
+        ("reviews-detail", anonymous, "get",
+         get(f"{reviews_url}{review.id}/")),
+        ("reviews-create", admin_client, "post",
+         lambda i: (
+             f"/api/v1/titles/{free_titles[i % len(free_titles)]}/reviews/",
+             {"text": "Отзыв", "score": i % 10 + 1},
+         )),
+        ("reviews-update", token_client(review.author), "patch",
+         lambda i: (f"{reviews_url}{review.id}/", {"text": f"Отзыв {i}"})),
+        ("reviews-delete", admin_client, "delete", delete_review),
+        ("comments-list", anonymous, "get", get(comments_url)),
+        ("comments-detail", anonymous, "get",
+         get(f"{comments_url}{comment.id}/")),
+        ("comments-create", user_client, "post",
+         lambda i: (comments_url, {"text": f"Комментарий {i}"})),
+        ("comments-update", token_client(comment.author), "patch",
+         lambda i: (
+             f"{comments_url}{comment.id}/", {"text": f"Комментарий {i}"}
+         )),
+        ("comments-delete", admin_client, "delete", delete_comment),
+        ("users-list", admin_client, "get", get("/api/v1/users/")),
+        ("users-create", admin_client, "post",
+         lambda i: ("/api/v1/users/", {
+             "username": f"created{i}", "email": f"created{i}@yamdb.fake"
+         })),
+        ("users-detail", admin_client, "get",
+         get(f"/api/v1/users/{user.username}/")),
+        ("users-update", admin_client, "patch",
+         lambda i: (
+             f"/api/v1/users/{user.username}/", {"bio": f"О себе {i}"}
+         )),
+        ("users-delete", admin_client, "delete", delete_user),
+        ("users-me", user_client, "get", get("/api/v1/users/me/")),
+        ("users-me-update", user_client, "patch",
+         lambda i: ("/api/v1/users/me/", {"bio": f"Обо мне {i}"})),
+        ("auth-signup", anonymous, "post",
+         lambda i: ("/api/v1/auth/signup/", {
+             "username": f"signup{i}", "email": f"signup{i}@yamdb.fake"
+         })),
+        ("auth-token", anonymous, "post",
+         lambda i: ("/api/v1/auth/token/", {
+             "username": user.username,
+             "confirmation_code": user.confirmation_code,
+         })),
+        ("sql-stats", admin_client, "get", get("/api/v1/sql-stats/")),
+        ("sql-stats-reset", admin_client, "delete",
+         get("/api/v1/sql-stats/")),
+        ("cache-stats", admin_client, "get", get("/api/v1/cache-stats/")),
+        ("cache-stats-reset", admin_client, "delete",
+         get("/api/v1/cache-stats/")),
+    ]
+
+
+def percentile(values, percent):
+    """Перцентиль по ближайшему рангу."""
+    ordered = sorted(values)
+    rank = max(ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def run_endpoint(client, method, request, iterations, warmup=0, cold=False):
+    latencies, queries, statuses = [], [], set()
+    for i in range(warmup + iterations):
+        url, data = request(i)
+        if cold:
+            response_cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = getattr(client, method)(
+                url, data=data, format="json"
+            )
+            elapsed = time.perf_counter() - started
+        if i < warmup:
+            continue
+        latencies.append(elapsed * 1000)
+        queries.append(len(context.captured_queries))
+        statuses.add(response.status_code)
+    total = sum(latencies) / 1000
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(mean(latencies), 3),
+        "throughput_rps": round(iterations / total, 1) if total else None,
+        "queries_median": median(queries),
+        "queries_max": max(queries),
+        "statuses": sorted(statuses),
+    }
+
+
+def run_benchmark(iterations=50, warmup=5, cold=False, only=None):
+    results = {}
+    for name, client, method, request in build_endpoints():
+        if only and name not in only:
+            continue
+        results[name] = run_endpoint(
+            client, method, request, iterations, warmup, cold
+        )
+    return results
+
+
+def compare(results, baseline, threshold=10):
+    """Сравнивает с эталоном: список (имя, метрика, было, стало, %)."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric in ("p50_ms", "p95_ms", "queries_max"):
+            before, after = previous[metric], current[metric]
+            if not before:
+                continue
+            change = (after - before) / before * 100
+            if change > threshold:
+                regressions.append((name, metric, before, after, change))
+    return regressions
@@ -0,0 +1,168 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from reviews import leaderboards, slugs
+from reviews.models import Title
+from reviews.versions import bump_version
+from .serializers import TitleBulkSerializer
+
+GenreTitle = Title.genre.through
+BATCH_SIZE = 500
+
+
+def bulk_limit():
+    return getattr(settings, "TITLES_BULK_LIMIT", 1000)
+
+
+def validate_items(items):
+    """Проверка формата; ошибки складываются в results по индексу."""
+    results = [None] * len(items)
+    valid = {}
+    for index, item in enumerate(items):
+        serializer = TitleBulkSerializer(
+            data=item, partial=isinstance(item, dict) and "id" in item
+        )
+        if serializer.is_valid():
+            valid[index] = serializer.validated_data
+        else:
+            results[index] = {"errors": serializer.errors}
+    return valid, results
+
+
+def resolve(valid, results):
+    """Slug-и берутся из справочника reviews.slugs, обновляемые
+    произведения читаются одним запросом."""
+    categories = slugs.categories.id_map()
+    genres = slugs.genres.id_map()
+    titles = Title.objects.only(
+        "id", "name", "year", "description", "category_id", "rating",
+        "modified",
+    ).in_bulk({data["id"] for data in valid.values() if "id" in data})
+
+    seen = set()
+    for index, data in list(valid.items()):
+        errors = {}
+        if "category" in data and data["category"] not in categories:
+            errors["category"] = [
+                f"Категория {data['category']} не найдена."
+            ]
+        missing = [
+            slug for slug in data.get("genre", ()) if slug not in genres
+        ]
+        if missing:
+            errors["genre"] = [f"Жанр {slug} не найден." for slug in missing]
+        if "id" in data:
+            if data["id"] not in titles:
+                errors["id"] = ["Произведение не найдено."]
+            elif data["id"] in seen:
+                errors["id"] = ["Произведение уже есть в пакете."]
+            seen.add(data["id"])
+        if errors:
+            results[index] = {"errors": errors}
+            del valid[index]
+    return categories, genres, titles
+
+
+def genre_rows(title_id, data, genres):
+    return [
+        GenreTitle(title_id=title_id, genre_id=genres[slug])
+        for slug in dict.fromkeys(data["genre"])
+    ]
+
+
+def create_titles(items, categories, genres):
+    titles = [
+        Title(
+            name=data["name"],
+            year=data["year"],
+            description=data.get("description"),
+            category_id=categories[data["category"]],
+        )
+        for _, data in items
+    ]
+    Title.objects.bulk_create(titles, batch_size=BATCH_SIZE)
+    if titles and not connection.features.can_return_ids_from_bulk_insert:
+        # SQLite не возвращает id из bulk_create. Вызывается в транзакции
+        # save_titles: после вставки запись в таблицу заблокирована,
+        # поэтому новые строки - последние по id (AUTOINCREMENT).
+        ids = Title.objects.order_by("-id").values_list(
+            "id", flat=True
+        )[:len(titles)]
+        for title, pk in zip(titles, sorted(ids)):
+            title.pk = pk
+    rows = []
+    for title, (_, data) in zip(titles, items):
+        rows.extend(genre_rows(title.pk, data, genres))
+    GenreTitle.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return titles
+
+
+def update_titles(items, categories, genres, titles):
+    # Элементы группируются по набору полей: bulk_update пишет все
+    # переданные поля, и частичный элемент не должен затирать остальные
+    # значениями, прочитанными до транзакции.
+    groups = defaultdict(list)
+    now = timezone.now()
+    for _, data in items:
+        title = titles[data["id"]]
+        fields = [
+            field for field in ("name", "year", "description")
+            if field in data
+        ]
+        for field in fields:
+            setattr(title, field, data[field])
+        if "category" in data:
+            title.category_id = categories[data["category"]]
+            fields.append("category")
+        if fields:
+            # bulk_update не выставляет auto_now.
+            title.modified = now
+            groups[(*fields, "modified")].append(title)
+    for fields, changed in groups.items():
+        Title.objects.bulk_update(changed, fields, batch_size=BATCH_SIZE)
+
+    with_genres = [data for _, data in items if "genre" in data]
+    GenreTitle.objects.filter(
+        title_id__in=[data["id"] for data in with_genres]
+    ).delete()
+    GenreTitle.objects.bulk_create(
+        [row for data in with_genres
+         for row in genre_rows(data["id"], data, genres)],
+        batch_size=BATCH_SIZE,
+    )
+    # В рейтингах лучших есть только произведения с оценкой.
+    return [
+        data["id"] for _, data in items
+        if titles[data["id"]].rating is not None
+        and ("category" in data or "genre" in data)
+    ]
+
+
+def save_titles(items):
+    """Создаёт и обновляет пакет произведений.
+
+    Элементы с id обновляются (можно передать только часть полей),
+    без id - создаются. Ошибочные элементы пропускаются, остальные
+    записываются в одной транзакции. Возвращает список результатов
+    в порядке элементов.
+    """
+    valid, results = validate_items(items)
+    categories, genres, titles = resolve(valid, results)
+    created = [(i, data) for i, data in valid.items() if "id" not in data]
+    updated = [(i, data) for i, data in valid.items() if "id" in data]
+    with transaction.atomic():
+        new_titles = create_titles(created, categories, genres)
+        reranked = update_titles(updated, categories, genres, titles)
+        for title_id in reranked:
+            leaderboards.update_title(title_id)
+    if valid:
+        bump_version("titles")
+
+    for (index, _), title in zip(created, new_titles):
+        results[index] = {"id": title.pk, "status": "created"}
+    for index, data in updated:
+        results[index] = {"id": data["id"], "status": "updated"}
+    return results
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Кэши, которые видит только один процесс.
+PROCESS_LOCAL = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register()
+def shared_cache_check(app_configs, **kwargs):
+    """Версии ресурсов и токенов должны быть общими для процессов."""
+    backend = settings.CACHES["default"]["BACKEND"]
+    if settings.DEBUG or backend not in PROCESS_LOCAL:
+        return []
+    return [Error(
+        f"Кэш {backend} не общий для процессов сервера: запись в одном "
+        f"процессе не сбросит кэши и не отзовёт токены в других.",
+        hint="Используйте DatabaseCache или memcached (CACHE_BACKEND).",
+        id="api.E001",
+    )]
@@ -1,26 +1,87 @@
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework as filter
+from rest_framework.filters import OrderingFilter
 
+from reviews import slugs
 from reviews.models import Title
+from reviews.search import search_titles
+
+GenreTitle = Title.genre.through
+
+
+def split_slugs(value):
+    return [slug.strip() for slug in value.split(',') if slug.strip()]
 
 
 class TitleFilter(filter.FilterSet):
-    category = filter.CharFilter(
-        field_name='category__slug',
-        lookup_expr='icontains'
-    )
-    name = filter.CharFilter(
-        field_name='name',
-        lookup_expr='icontains'
-    )
-    genre = filter.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='icontains'
-    )
+    """Фильтры списка произведений.
+
+    ?genre= и ?category= принимают slug через запятую, ?genre_mode=all
+    оставляет произведения со всеми перечисленными жанрами. Жанры
+    проверяются через EXISTS, без JOIN и DISTINCT; slug-и переводятся
+    в id справочником reviews.slugs.
+    """
+
+    category = filter.CharFilter(method='filter_category')
+    name = filter.CharFilter(method='filter_name')
+    genre = filter.CharFilter(method='filter_genre')
     year = filter.CharFilter(
         field_name='year',
         lookup_expr='exact',
     )
+    year__gte = filter.NumberFilter(field_name='year', lookup_expr='gte')
+    year__lte = filter.NumberFilter(field_name='year', lookup_expr='lte')
 
     class Meta:
         model = Title
         fields = ('name', 'year', 'category', 'genre')
+
+    def filter_category(self, queryset, name, value):
+        names = split_slugs(value)
+        # Пустой список (например, ?category=,) - фильтра нет.
+        if not names:
+            return queryset
+        return queryset.filter(
+            category_id__in=slugs.categories.ids(names)
+        )
+
+    def filter_genre(self, queryset, name, value):
+        names = split_slugs(value)
+        if not names:
+            return queryset
+        if self.data.get('genre_mode') == 'all':
+            groups = [[slug] for slug in names]
+        else:
+            groups = [names]
+        for index, group in enumerate(groups):
+            flag = f'_has_genre_{index}'
+            queryset = queryset.annotate(**{flag: Exists(
+                GenreTitle.objects.filter(
+                    title_id=OuterRef('pk'),
+                    genre_id__in=slugs.genres.ids(group),
+                )
+            )}).filter(**{flag: True})
+        return queryset
+
+    def filter_name(self, queryset, name, value):
+        """Поиск по полнотекстовому индексу, ?name_mode=substring - по
+        подстроке названия."""
+        if self.data.get('name_mode') != 'substring':
+            found = search_titles(queryset, value)
+            if found is not None:
+                return found
+        return queryset.filter(name__icontains=value)
+
+
+class TitleOrderingFilter(OrderingFilter):
+    """?ordering= для произведений.
+
+    В конец добавляется id в том же направлении, что и последнее поле:
+    порядок однозначен и совпадает с составными индексами модели.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering or ordering[-1].lstrip('-') == 'id':
+            return ordering
+        return [*ordering, '-id' if ordering[-1].startswith('-') else 'id']
@@ -0,0 +1,113 @@
+# Запуск: python manage.py benchmark --output bench.json [--baseline old.json]
+
+import json
+import platform
+import sys
+
+from django import get_version
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from api.benchmark import compare, run_benchmark, seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Замер задержки, пропускной способности и числа SQL-запросов "
+        "эндпоинтов API на отдельной тестовой базе."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--titles", type=int, default=200)
+        parser.add_argument("--reviews-per-title", type=int, default=20)
+        parser.add_argument("--comments-per-review", type=int, default=2)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help="Очищать кэш ответов перед каждым запросом.",
+        )
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            dest="endpoints",
+            help="Замерить только указанные эндпоинты.",
+        )
+        parser.add_argument("--output", help="Файл для результатов в JSON.")
+        parser.add_argument("--baseline", help="JSON прошлого запуска.")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=10,
+            help="Допустимое ухудшение относительно эталона, %%.",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as file:
+                baseline = json.load(file)["endpoints"]
+
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            dataset = seed_dataset(
+                options["titles"],
+                options["reviews_per_title"],
+                options["comments_per_review"],
+                options["seed"],
+            )
+            results = run_benchmark(
+                options["iterations"],
+                options["warmup"],
+                options["cold"],
+                options["endpoints"],
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.report(results)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump({
+                    "meta": {
+                        "created": timezone.now().isoformat(),
+                        "dataset": dataset,
+                        "iterations": options["iterations"],
+                        "cold": options["cold"],
+                        "python": platform.python_version(),
+                        "django": get_version(),
+                        "database": connection.vendor,
+                    },
+                    "endpoints": results,
+                }, file, ensure_ascii=False, indent=2)
+        if baseline is not None:
+            regressions = compare(results, baseline, options["threshold"])
+            for name, metric, before, after, change in regressions:
+                self.stdout.write(self.style.ERROR(
+                    f"{name}: {metric} {before} -> {after} (+{change:.0f}%)"
+                ))
+            if regressions:
+                raise CommandError("Есть ухудшения относительно эталона.")
+            self.stdout.write(self.style.SUCCESS("Ухудшений нет."))
+
+    def report(self, results):
+        header = (
+            f"{'эндпоинт':<26}{'p50':>9}{'p95':>9}{'p99':>9}"
+            f"{'rps':>9}{'SQL':>6}  статусы"
+        )
+        self.stdout.write(header)
+        for name, result in results.items():
+            rps = result["throughput_rps"] or 0
+            self.stdout.write(
+                f"{name:<26}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+                f"{result['p99_ms']:>9.2f}{rps:>9.0f}"
+                f"{result['queries_max']:>6}  {result['statuses']}"
+            )
+        sys.stdout.flush()
@@ -1,4 +1,14 @@
-from rest_framework import mixins, viewsets
+from hashlib import md5
+from urllib.parse import urlencode
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework import mixins, status, viewsets
+from rest_framework.response import Response
+
+from reviews.versions import get_last_modified, get_version
+from .cache import response_cache
 
 
 class ListCreateDestroyViewSet(
@@ -8,3 +18,127 @@ class ListCreateDestroyViewSet(
     viewsets.GenericViewSet,
 ):
     pass
+
+
+class CachedListMixin:
+    """Кэширует ответы list до следующей записи в ресурс.
+
+    Ключ включает версию ресурса cache_resource, путь и строку запроса.
+    """
+
+    cache_resource = None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def get_cache_key(self, request):
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        version = get_version(self.cache_resource)
+        return f"{self.cache_resource}:{version}:{request.path}?{query}"
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_cache_key(request)
+        data = response_cache.get(key)
+        if data is not None:
+            return Response(data, headers={"X-Cache": "HIT"})
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response_cache.set(key, response.data)
+        response["X-Cache"] = "MISS"
+        return response
+
+
+class CachedResponseMixin(CachedListMixin):
+    """Кэширует ответы list и retrieve."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class ConditionalGetMixin:
+    """ETag и Last-Modified для list и retrieve.
+
+    На If-None-Match и If-Modified-Since отвечает 304, не сериализуя
+    данные. Для списка валидатор строится по количеству объектов и
+    последнему изменению в выборке, а у ресурсов с версией (cache_resource
+    или count_resource) - по версии, без запросов к базе. Объект с
+    cache_resource тоже проверяется по версии, до get_object.
+    """
+
+    modified_field = "modified"
+
+    def list(self, request, *args, **kwargs):
+        resource = getattr(self, "cache_resource", None) or getattr(
+            self, "count_resource", None
+        )
+        if resource:
+            state = get_version(resource)
+            last_modified = get_last_modified(resource)
+        else:
+            queryset = self.filter_queryset(self.get_queryset())
+            aggregate = queryset.aggregate(
+                count=Count("pk"), last_modified=Max(self.modified_field)
+            )
+            last_modified = aggregate["last_modified"]
+            state = (aggregate["count"], last_modified)
+        etag = self.make_etag(request, state)
+        return self.conditional_response(
+            request, etag, last_modified, super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        resource = getattr(self, "cache_resource", None)
+        if resource:
+            # Запись в объект или связанные с ним меняет версию ресурса,
+            # поэтому валидатор строится без запросов к базе, а ответ
+            # при промахе берётся из кэша ответов.
+            lookup = self.lookup_url_kwarg or self.lookup_field
+            state = (kwargs.get(lookup), get_version(resource))
+            etag = self.make_etag(request, state)
+            return self.conditional_response(
+                request,
+                etag,
+                get_last_modified(resource),
+                super().retrieve,
+                *args,
+                **kwargs,
+            )
+        instance = self.get_object()
+        last_modified = getattr(instance, self.modified_field)
+        etag = self.make_etag(request, (instance.pk, last_modified))
+        # Повторно объект из базы не загружается, см. get_object.
+        self.conditional_object = instance
+        return self.conditional_response(
+            request, etag, last_modified, super().retrieve, *args, **kwargs
+        )
+
+    def get_object(self):
+        instance = getattr(self, "conditional_object", None)
+        if instance is not None:
+            return instance
+        return super().get_object()
+
+    def make_etag(self, request, state):
+        digest = md5(f"{request.get_full_path()}:{state}".encode())
+        return quote_etag(digest.hexdigest())
+
+    def conditional_response(
+        self, request, etag, last_modified, handler, *args, **kwargs
+    ):
+        timestamp = (
+            int(last_modified.timestamp()) if last_modified else None
+        )
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (
+            status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED
+        ):
+            response["ETag"] = etag
+            if timestamp is not None:
+                response["Last-Modified"] = http_date(timestamp)
+        return response
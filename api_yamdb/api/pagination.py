@@ -0,0 +1,266 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from collections import OrderedDict
+from functools import reduce
+from operator import or_
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from reviews.versions import get_version
+
+
+class KeysetPagination(LimitOffsetPagination):
+    """Limit/offset по умолчанию, keyset-курсор по запросу.
+
+    Курсорный режим включается параметром ?pagination=cursor или
+    наличием ?cursor=. Порядок задаётся атрибутом вьюсета cursor_ordering,
+    последнее поле которого должно быть уникальным (обычно id).
+    """
+
+    cursor_query_param = "cursor"
+    mode_query_param = "pagination"
+    cursor_mode = "cursor"
+    invalid_cursor_message = "Неверный курсор."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = self.is_cursor_request(request, view)
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.ordering = tuple(view.cursor_ordering)
+        position, reverse = self.decode_cursor(request)
+
+        queryset = queryset.order_by(
+            *(("-" if reverse else "") + field for field in self.ordering)
+        )
+        if position is not None:
+            queryset = queryset.filter(self.after(position, reverse))
+        results = list(queryset[:self.limit + 1])
+        has_more = len(results) > self.limit
+        results = results[:self.limit]
+        if reverse:
+            results.reverse()
+
+        first = self.get_position(results[0]) if results else None
+        last = self.get_position(results[-1]) if results else None
+        if reverse:
+            self.next_position = last or position
+            self.previous_position = first if has_more else None
+        else:
+            self.next_position = last if has_more else None
+            self.previous_position = first if position is not None else None
+        return results
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]))
+
+    def get_next_link(self):
+        if not self.use_cursor:
+            return super().get_next_link()
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.use_cursor:
+            return super().get_previous_link()
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def get_html_context(self):
+        if not self.use_cursor:
+            return super().get_html_context()
+        return {
+            "previous_url": self.get_previous_link(),
+            "next_url": self.get_next_link(),
+        }
+
+    def is_cursor_request(self, request, view):
+        if not getattr(view, "cursor_ordering", None):
+            return False
+        return (
+            request.query_params.get(self.mode_query_param) == self.cursor_mode
+            or self.cursor_query_param in request.query_params
+        )
+
+    def after(self, position, reverse):
+        """Условие "строго после позиции" для составного ключа."""
+        lookup = "lt" if reverse else "gt"
+        conditions = []
+        for index, field in enumerate(self.ordering):
+            equal = {
+                name: value
+                for name, value in zip(self.ordering[:index], position)
+            }
+            conditions.append(
+                Q(**equal, **{f"{field}__{lookup}": position[index]})
+            )
+        return reduce(or_, conditions)
+
+    def get_position(self, instance):
+        position = []
+        for field in self.ordering:
+            value = getattr(instance, field)
+            if not isinstance(value, (int, str)):
+                value = str(value)
+            position.append(value)
+        return position
+
+    def encode_cursor(self, position, reverse):
+        payload = {"p": position}
+        if reverse:
+            payload["r"] = 1
+        cursor = urlsafe_b64encode(json.dumps(payload).encode()).decode()
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.offset_query_param)
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(cursor.encode()).decode())
+            position = payload["p"]
+            reverse = bool(payload.get("r"))
+        except (BinasciiError, KeyError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(
+            self.ordering
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+
+class CachedCountPagination(KeysetPagination):
+    """Limit/offset с кэшированным COUNT.
+
+    Количество хранится в кэше по версии ресурса (атрибут вьюсета
+    count_resource), пути и нормализованным параметрам фильтра, поэтому
+    любая запись в ресурс его сбрасывает; запись в кэше к тому же
+    живёт не дольше COUNT_CACHE_TIMEOUT секунд. Выше порога
+    COUNT_ESTIMATE_THRESHOLD точный подсчёт заменяется оценкой
+    планировщика, если база её даёт. ?count=false отключает подсчёт:
+    наличие следующей страницы определяется по лишней строке.
+    """
+
+    count_query_param = "count"
+    # Параметры, которые не влияют на количество.
+    page_query_params = (
+        "limit", "offset", "cursor", "pagination", "count", "ordering",
+    )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.view = view
+        self.count_estimated = False
+        self.skip_count = request.query_params.get(
+            self.count_query_param, ""
+        ).lower() in ("false", "0", "no")
+        if not self.skip_count or self.is_cursor_request(request, view):
+            self.skip_count = False
+            return super().paginate_queryset(queryset, request, view)
+
+        self.use_cursor = False
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        results = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(results) > self.limit
+        return results[:self.limit]
+
+    def get_count(self, queryset):
+        key = self.get_count_cache_key()
+        cached = cache.get(key) if key else None
+        if cached is not None:
+            count, self.count_estimated = cached
+            return count
+
+        threshold = getattr(settings, "COUNT_ESTIMATE_THRESHOLD", 100000)
+        # Подсчёт ограничен порогом: дороже он не становится.
+        count = queryset[:threshold + 1].count()
+        if count > threshold:
+            estimate = estimate_count(queryset)
+            if estimate is None:
+                count = queryset.count()
+            else:
+                count, self.count_estimated = max(estimate, count), True
+        if key:
+            cache.set(
+                key,
+                (count, self.count_estimated),
+                getattr(settings, "COUNT_CACHE_TIMEOUT", 300),
+            )
+        return count
+
+    def get_count_cache_key(self):
+        resource = getattr(self.view, "count_resource", None)
+        if resource is None:
+            return None
+        query = urlencode(sorted(
+            (name, sorted(values))
+            for name, values in self.request.query_params.lists()
+            if name not in self.page_query_params
+        ), doseq=True)
+        version = get_version(resource)
+        return f"count:{resource}:{version}:{self.request.path}?{query}"
+
+    def get_paginated_response(self, data):
+        if self.skip_count:
+            return Response(OrderedDict([
+                ("next", self.get_next_link()),
+                ("previous", self.get_previous_link()),
+                ("results", data),
+            ]))
+        response = super().get_paginated_response(data)
+        if self.count_estimated:
+            response.data["count_estimated"] = True
+        return response
+
+    def get_next_link(self):
+        if not self.skip_count:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(
+            url, self.offset_query_param, self.offset + self.limit
+        )
+
+
+def estimate_count(queryset):
+    """Оценка числа строк по плану запроса или None.
+
+    Оценку даёт только PostgreSQL; на других базах считается точно.
+    """
+    db = connections[queryset.db]
+    if db.vendor != "postgresql":
+        return None
+    sql, params = queryset.query.sql_with_params()
+    with db.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -1,11 +1,15 @@
 from django.conf import settings
-from django.core.mail import send_mail
+from django.db import transaction
 from django.utils.crypto import get_random_string
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 from rest_framework.exceptions import ValidationError
 
+from reviews import slugs
 from reviews.models import Category, Comment, CustomUser, Genre, Review, Title
+from reviews.outbox import enqueue_mail
+from reviews.ratings import SCORES, score_field
+from reviews.validators import validate_year
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -43,14 +47,15 @@ class UserSerializer(serializers.ModelSerializer):
         request = self.context.get("request")
         if request and hasattr(request, "user"):
             current_user_admin = request.user.is_admin
-        if not current_user_admin:  # отправка, если не админ
-            send_mail(
-                "Код подтверждения для регистрации YamDB",
-                f"{username} Ваш код подтверждения: {confirmation_code}",
-                from_email=settings.EMAIL_HOST_USER,
-                recipient_list=(email,),
-            )
-        user.save()
+        with transaction.atomic():
+            user.save()
+            if not current_user_admin:  # отправка, если не админ
+                enqueue_mail(
+                    "Код подтверждения для регистрации YamDB",
+                    f"{username} Ваш код подтверждения: {confirmation_code}",
+                    from_email=settings.EMAIL_HOST_USER,
+                    recipient_list=(email,),
+                )
         return validated_data
 
 
@@ -72,11 +77,70 @@ class CategorySerializer(serializers.ModelSerializer):
         )
 
 
+class DirectoryField(serializers.Field):
+    """Жанр или категория из справочника reviews.slugs по id.
+
+    Для внешнего ключа хватает <поле>_id без JOIN, для many=True
+    из предзагруженной связи нужны только id.
+    """
+
+    def __init__(self, directory, many=False, **kwargs):
+        self.directory = directory
+        self.many = many
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        if self.many:
+            return [obj.pk for obj in getattr(instance, self.source).all()]
+        return getattr(instance, f"{self.source}_id")
+
+    def to_representation(self, value):
+        if self.many:
+            return [self.represent(pk) for pk in value]
+        return self.represent(value)
+
+    def snapshot(self):
+        # Снимок справочника берётся один раз на сериализацию (контекст
+        # общий для всех полей и элементов списка): иначе версия ресурса
+        # читалась бы из кэша для каждого произведения.
+        snapshots = self.context.setdefault("directories", {})
+        resource = self.directory.resource
+        if resource not in snapshots:
+            snapshots[resource] = self.directory.load()
+        return snapshots[resource]
+
+    def represent(self, pk):
+        obj = self.snapshot().by_id.get(pk)
+        if obj is None:
+            return None
+        return {"name": obj.name, "slug": obj.slug}
+
+
+class DirectorySlugField(serializers.SlugRelatedField):
+    """SlugRelatedField, который ищет slug в справочнике в памяти."""
+
+    def __init__(self, directory, **kwargs):
+        self.directory = directory
+        super().__init__(
+            slug_field="slug", queryset=directory.model.objects.all(),
+            **kwargs
+        )
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail("invalid")
+        obj = self.directory.by_slug(data)
+        if obj is None:
+            self.fail("does_not_exist", slug_name="slug", value=data)
+        return obj
+
+
 class TitleSerializer(serializers.ModelSerializer):
     """Сериализатор для GET."""
 
-    category = CategorySerializer(read_only=True)
-    genre = GenreSerializer(many=True, read_only=True)
+    category = DirectoryField(slugs.categories)
+    genre = DirectoryField(slugs.genres, many=True)
 
     class Meta:
         model = Title
@@ -85,6 +149,8 @@ class TitleSerializer(serializers.ModelSerializer):
             "name",
             "year",
             "rating",
+            "weighted_rating",
+            "reviews_count",
             "description",
             "genre",
             "category",
@@ -92,15 +158,30 @@ class TitleSerializer(serializers.ModelSerializer):
         # read_only_fields = ("id",)
 
 
+class TitleSummarySerializer(serializers.ModelSerializer):
+    """Сводка оценок произведения для шкалы рейтинга."""
+
+    average = serializers.SerializerMethodField()
+    histogram = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Title
+        fields = ("id", "rating", "average", "reviews_count", "histogram")
+
+    def get_average(self, obj):
+        if not obj.reviews_count:
+            return None
+        return round(obj.score_sum / obj.reviews_count, 2)
+
+    def get_histogram(self, obj):
+        return {score: getattr(obj, score_field(score)) for score in SCORES}
+
+
 class TitleCreateSerializer(serializers.ModelSerializer):
     """Сериализатор для POST, PATH."""
 
-    category = serializers.SlugRelatedField(
-        slug_field="slug", queryset=Category.objects.all()
-    )
-    genre = serializers.SlugRelatedField(
-        many=True, slug_field="slug", queryset=Genre.objects.all()
-    )
+    category = DirectorySlugField(slugs.categories)
+    genre = DirectorySlugField(slugs.genres, many=True)
 
     class Meta:
         model = Title
@@ -113,6 +194,34 @@ class TitleCreateSerializer(serializers.ModelSerializer):
             "category",
         )
 
+    def update(self, instance, validated_data):
+        genres = validated_data.pop("genre", None)
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        # Только поля сериализатора: счётчики, прочитанные в get_object,
+        # затёрли бы отзывы, записанные параллельно.
+        instance.save(update_fields=[*validated_data, "modified"])
+        if genres is not None:
+            instance.genre.set(genres)
+        return instance
+
+
+class TitleBulkSerializer(serializers.Serializer):
+    """Элемент пакета произведений.
+
+    Slug-и только проверяются на формат: искать их в базе по одному
+    не нужно, api.bulk разрешает их сразу для всего пакета.
+    """
+
+    id = serializers.IntegerField(required=False, min_value=1)
+    name = serializers.CharField(max_length=256)
+    year = serializers.IntegerField(min_value=0, validators=[validate_year])
+    description = serializers.CharField(
+        max_length=200, required=False, allow_blank=True, allow_null=True
+    )
+    genre = serializers.ListField(child=serializers.SlugField())
+    category = serializers.SlugField()
+
 
 class ReviewSerializer(serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
@@ -131,8 +240,22 @@ class ReviewSerializer(serializers.ModelSerializer):
                 queryset=Review.objects.all(), fields=["author", "title"]
             )
         ]
-        fields = ("id", "text", "author", "score", "pub_date", "title")
-        read_only_fields = ("id", "author", "pub_date", "title")
+        fields = (
+            "id",
+            "text",
+            "author",
+            "score",
+            "pub_date",
+            "comments_count",
+            "title",
+        )
+        read_only_fields = (
+            "id",
+            "author",
+            "pub_date",
+            "comments_count",
+            "title",
+        )
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -0,0 +1,150 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# Литералы и списки IN заменяются, чтобы однотипные запросы совпадали.
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+IN_LISTS = re.compile(r"IN \((?:%s|\?)(?:, (?:%s|\?))*\)")
+
+
+def normalize(sql):
+    return IN_LISTS.sub("IN (...)", LITERALS.sub("?", sql))
+
+
+class QueryLog:
+    """Запросы к базе, выполненные за один HTTP-запрос."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                (sql, params, (time.perf_counter() - started) * 1000)
+            )
+
+    @property
+    def time_ms(self):
+        return sum(duration for _, _, duration in self.queries)
+
+    def repeats(self, key):
+        """Сколько запросов повторяют уже выполненные."""
+        counts = Counter(key(sql, params) for sql, params, _ in self.queries)
+        return sum(count - 1 for count in counts.values())
+
+    @property
+    def duplicates(self):
+        return self.repeats(lambda sql, params: (sql, repr(params)))
+
+    @property
+    def similar(self):
+        return self.repeats(lambda sql, params: normalize(sql))
+
+
+class ViewStats:
+    """Накопленная статистика SQL по представлениям."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.views = {}
+
+    def record(self, view, log, elapsed_ms):
+        queries = len(log.queries)
+        with self.lock:
+            stats = self.views.setdefault(view, {
+                "requests": 0,
+                "queries": 0,
+                "max_queries": 0,
+                "sql_ms": 0.0,
+                "request_ms": 0.0,
+                "duplicates": 0,
+                "similar": 0,
+            })
+            stats["requests"] += 1
+            stats["queries"] += queries
+            stats["max_queries"] = max(stats["max_queries"], queries)
+            stats["sql_ms"] += log.time_ms
+            stats["request_ms"] += elapsed_ms
+            stats["duplicates"] += log.duplicates
+            stats["similar"] += log.similar
+
+    def summary(self):
+        with self.lock:
+            views = {view: dict(stats) for view, stats in self.views.items()}
+        for stats in views.values():
+            stats["avg_queries"] = round(
+                stats["queries"] / stats["requests"], 2
+            )
+            stats["avg_sql_ms"] = round(stats["sql_ms"] / stats["requests"], 3)
+            stats["sql_ms"] = round(stats["sql_ms"], 3)
+            stats["request_ms"] = round(stats["request_ms"], 3)
+        return dict(sorted(views.items()))
+
+
+view_stats = ViewStats()
+
+
+def view_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    return match.view_name or match._func_path
+
+
+class SQLInstrumentationMiddleware:
+    """Считает запросы к базе для каждого HTTP-запроса.
+
+    Работает, только если включена настройка SQL_INSTRUMENTATION.
+    В режиме отладки добавляет заголовки X-SQL-*, медленные запросы
+    пишет в журнал списком SQL без параметров: в них бывают адреса
+    почты и коды подтверждения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, "SQL_INSTRUMENTATION", settings.DEBUG):
+            return self.get_response(request)
+        log = QueryLog()
+        started = time.perf_counter()
+        with connection.execute_wrapper(log):
+            response = self.get_response(request)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        view = view_name(request)
+        view_stats.record(view, log, elapsed_ms)
+        if getattr(settings, "SQL_DEBUG_HEADERS", settings.DEBUG):
+            response["X-SQL-Queries"] = len(log.queries)
+            response["X-SQL-Time-Ms"] = f"{log.time_ms:.3f}"
+            response["X-SQL-Duplicates"] = log.duplicates
+            response["X-SQL-Similar"] = log.similar
+        if elapsed_ms >= getattr(settings, "SLOW_REQUEST_MS", 500):
+            logger.warning(
+                "Медленный запрос %s %s (%s): %.1f мс, SQL: %s за %.1f мс\n%s",
+                request.method,
+                request.get_full_path(),
+                view,
+                elapsed_ms,
+                len(log.queries),
+                log.time_ms,
+                "\n".join(
+                    f"{duration:8.3f} мс  {normalize(sql)}"
+                    for sql, _, duration in log.queries
+                ),
+            )
+        return response
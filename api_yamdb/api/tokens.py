@@ -2,9 +2,18 @@ from rest_framework_simplejwt.tokens import AccessToken
 
 
 def get_jwt_token(user):
-    """Получает только jwt токен. В refresh токене нет необходимости."""
+    """Получает только jwt токен. В refresh токене нет необходимости.
+
+    Роль и флаги прав кладутся в токен, чтобы при запросах не загружать
+    пользователя из базы (см. api.authentication).
+    """
     token = AccessToken.for_user(user)
     token['email'] = user.email
+    token['username'] = user.username
+    token['role'] = user.role
+    token['is_staff'] = user.is_staff
+    token['is_superuser'] = user.is_superuser
+    token['ver'] = user.token_version
 
     return {
         "token": str(token)
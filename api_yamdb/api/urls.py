@@ -9,7 +9,9 @@ from .views import (
     ReviewViewSet,
     SignupViewSet,
     UserViewSet,
+    cache_stats,
     create_jwt_token,
+    sql_stats,
 )
 
 router = routers.DefaultRouter()
@@ -30,5 +32,7 @@ router.register(
 urlpatterns = [
     path("v1/auth/signup/", SignupViewSet.as_view()),
     path("v1/auth/token/", create_jwt_token),
+    path("v1/sql-stats/", sql_stats),
+    path("v1/cache-stats/", cache_stats),
     path("v1/", include(router.urls)),
 ]
@@ -1,16 +1,26 @@
+import os
+
 from django.core.exceptions import PermissionDenied
 from django.shortcuts import get_object_or_404
-from django.db.models import Avg
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import Http404
+from django.utils.crypto import constant_time_compare
 from rest_framework import filters, status, viewsets
 from rest_framework.response import Response
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.generics import CreateAPIView
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.exceptions import ParseError, ValidationError
 from rest_framework.permissions import AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
 
 from reviews.models import Category, Comment, CustomUser, Genre, Review, Title
+from reviews import leaderboards, slugs
+from reviews.ratings import (
+    SCORES,
+    score_field,
+)
 from .serializers import (
     CategorySerializer,
     CommentSerializer,
@@ -18,9 +28,19 @@ from .serializers import (
     ReviewSerializer,
     TitleCreateSerializer,
     TitleSerializer,
+    TitleSummarySerializer,
     UserSerializer,
 )
-from .mixins import ListCreateDestroyViewSet
+from .mixins import (
+    CachedListMixin,
+    CachedResponseMixin,
+    ConditionalGetMixin,
+    ListCreateDestroyViewSet,
+)
+from .bulk import bulk_limit, save_titles
+from .cache import response_cache
+from .pagination import CachedCountPagination
+from .sql import view_stats
 from .tokens import get_jwt_token
 from .permissions import (
     IsAdminOrReadOnly,
@@ -30,7 +50,9 @@ from .permissions import (
     IsAuthorOrAdminOrModerator,
     IsAuthorizedOrReadOnly,
 )
-from .filters import TitleFilter
+from .filters import TitleFilter, TitleOrderingFilter
+
+GENRE_IDS = Prefetch("genre", queryset=Genre.objects.only("id"))
 
 
 class SignupViewSet(CreateAPIView):
@@ -53,15 +75,48 @@ def create_jwt_token(request):
         CustomUser,
         username=username,
     )
-    if user.confirmation_code != request.data.get("confirmation_code"):
+    code = request.data.get("confirmation_code")
+    if not code or not user.confirmation_code or (
+        not constant_time_compare(user.confirmation_code, str(code))
+    ):
         raise ValidationError(code=400)
     return Response(get_jwt_token(user), status=status.HTTP_200_OK)
 
 
+@api_view(["GET", "DELETE"])
+@permission_classes([IsAdminOrSuperuser])
+def sql_stats(request):
+    """Статистика запросов к базе по представлениям; DELETE - сброс.
+
+    Счётчики свои у каждого процесса сервера: ответ и сброс относятся
+    к процессу pid, который обработал запрос.
+    """
+    if request.method == "DELETE":
+        view_stats.clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response({"pid": os.getpid(), "views": view_stats.summary()})
+
+
+@api_view(["GET", "DELETE"])
+@permission_classes([IsAdminOrSuperuser])
+def cache_stats(request):
+    """Статистика кэша ответов; DELETE - очистка.
+
+    Кэш ответов свой у каждого процесса сервера: ответ и очистка
+    относятся к процессу pid, который обработал запрос.
+    """
+    if request.method == "DELETE":
+        response_cache.clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response({"pid": os.getpid(), **response_cache.stats()})
+
+
 class UserViewSet(viewsets.ModelViewSet):
     queryset = CustomUser.objects.all()
     serializer_class = UserSerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = CachedCountPagination
+    count_resource = "users"
+    cursor_ordering = ("id",)
     lookup_field = "username"
 
     def get_permissions(self):
@@ -95,7 +150,8 @@ class UserViewSet(viewsets.ModelViewSet):
         return super(UserViewSet, self).partial_update(request)
 
 
-class CategoryViewSet(ListCreateDestroyViewSet):
+class CategoryViewSet(CachedListMixin, ListCreateDestroyViewSet):
+    cache_resource = "categories"
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     pagination_class = LimitOffsetPagination
@@ -105,7 +161,8 @@ class CategoryViewSet(ListCreateDestroyViewSet):
     lookup_field = "slug"
 
 
-class GenreViewSet(ListCreateDestroyViewSet):
+class GenreViewSet(CachedListMixin, ListCreateDestroyViewSet):
+    cache_resource = "genres"
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     pagination_class = LimitOffsetPagination
@@ -115,23 +172,130 @@ class GenreViewSet(ListCreateDestroyViewSet):
     lookup_field = "slug"
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all()
+class TitleViewSet(
+    ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet
+):
+    cache_resource = "titles"
+    # Жанры и категория сериализуются из reviews.slugs, из базы
+    # нужны только id.
+    queryset = Title.objects.prefetch_related(GENRE_IDS).order_by("id")
     serializer_class = TitleSerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = CachedCountPagination
+    count_resource = "titles"
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, TitleOrderingFilter)
     filterset_class = TitleFilter
+    ordering_fields = (
+        "id",
+        "rating",
+        "weighted_rating",
+        "year",
+        "name",
+        "reviews_count",
+    )
+
+    @property
+    def cursor_ordering(self):
+        # Курсор строится только по id; с ?ordering= остаётся limit/offset.
+        if self.request.query_params.get(TitleOrderingFilter.ordering_param):
+            return None
+        return ("id",)
 
     def get_serializer_class(self):
         if self.request.method in ("POST", "PATCH"):
             return TitleCreateSerializer
         return TitleSerializer
 
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """Создание и обновление пакета произведений с ошибками
+        по каждому элементу."""
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError("Ожидается список произведений.")
+        if len(items) > bulk_limit():
+            raise ValidationError(
+                f"В пакете больше {bulk_limit()} произведений."
+            )
+        results = save_titles(items)
+        created, updated, failed = (
+            sum(result.get("status") == kind for result in results)
+            for kind in ("created", "updated", None)
+        )
+        if failed == len(results):
+            code = status.HTTP_400_BAD_REQUEST
+        elif failed:
+            code = status.HTTP_207_MULTI_STATUS
+        elif created:
+            code = status.HTTP_201_CREATED
+        else:
+            code = status.HTTP_200_OK
+        return Response(
+            {
+                "created": created,
+                "updated": updated,
+                "failed": failed,
+                "results": results,
+            },
+            status=code,
+        )
+
+    @action(detail=False)
+    def top(self, request):
+        """Лучшие произведения каталога."""
+        return self.top_response(leaderboards.ALL)
+
+    @action(
+        detail=False,
+        url_path=r"top/(?P<group>category|genre)/(?P<slug>[-a-zA-Z0-9_]+)",
+    )
+    def top_group(self, request, group, slug):
+        """Лучшие произведения категории или жанра."""
+        if group == "category":
+            category = slugs.categories.by_slug(slug)
+            if category is None:
+                raise Http404
+            return self.top_response(leaderboards.category_board(category.id))
+        genre = slugs.genres.by_slug(slug)
+        if genre is None:
+            raise Http404
+        return self.top_response(leaderboards.genre_board(genre.id))
+
+    def top_response(self, board):
+        # Читается готовый рейтинг: стоимость O(limit), без сортировки
+        # каталога.
+        limit = self.request.query_params.get("limit")
+        try:
+            limit = int(limit or leaderboards.board_size())
+        except ValueError:
+            raise ParseError(f"Неверный limit: {limit}")
+        limit = max(1, min(limit, leaderboards.board_size()))
+        titles = leaderboards.top_titles(board).prefetch_related(
+            GENRE_IDS
+        )[:limit]
+        return Response(TitleSerializer(titles, many=True).data)
+
+    @action(detail=True)
+    def summary(self, request, pk=None):
+        """Распределение оценок; читается из полей произведения
+        без обращения к отзывам."""
+        title = get_object_or_404(
+            Title.objects.only(
+                "rating",
+                "score_sum",
+                "reviews_count",
+                *(score_field(score) for score in SCORES),
+            ),
+            pk=pk,
+        )
+        return Response(TitleSummarySerializer(title).data)
 
-class ReviewViewSet(viewsets.ModelViewSet):
+
+class ReviewViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = CachedCountPagination
+    count_resource = "reviews"
+    cursor_ordering = ("pub_date", "id")
     permission_classes = (IsAuthorizedOrReadOnly,)
 
     def get_permissions(self):
@@ -143,7 +307,10 @@ class ReviewViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         title_id = self.kwargs.get("title_id")
-        new_queryset = Review.objects.filter(title=title_id)
+        # Авторы подтягиваются одним JOIN для всей страницы.
+        new_queryset = Review.objects.filter(
+            title=title_id
+        ).select_related("author")
         return new_queryset
 
     def perform_create(self, serializer):
@@ -152,22 +319,18 @@ class ReviewViewSet(viewsets.ModelViewSet):
             title=title, author=self.request.user
         ).exists():
             raise ValidationError(code=400)
-        serializer.save(
-            author=self.request.user,
-            title=title,
-        )
-        rating = Review.objects.filter(title=title).aggregate(Avg("score"))
-        title.rating = rating["score__avg"]
-        title.save(update_fields=["rating"])
+        # Рейтинг произведения сдвигается сигналом post_save.
+        with transaction.atomic():
+            serializer.save(
+                author=self.request.user,
+                title=title,
+            )
 
     def perform_update(self, serializer):
         if serializer.instance.author != self.request.user:
             raise PermissionDenied("Изменение чужих постов запрещено!")
-        serializer.save()
-        title = get_object_or_404(Title, pk=self.kwargs.get("title_id"))
-        rating = Review.objects.filter(title=title).aggregate(Avg("score"))
-        title.rating = rating["score__avg"]
-        title.save(update_fields=["rating"])
+        with transaction.atomic():
+            serializer.save()
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -175,16 +338,15 @@ class ReviewViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     def perform_destroy(self, instance):
+        # Рейтинг произведения сдвигается сигналом post_delete.
         instance.delete()
-        title = get_object_or_404(Title, pk=self.kwargs.get("title_id"))
-        rating = Review.objects.filter(title=title).aggregate(Avg("score"))
-        title.rating = rating["score__avg"]
-        title.save(update_fields=["rating"])
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = CachedCountPagination
+    count_resource = "comments"
+    cursor_ordering = ("pub_date", "id")
     permission_classes = (IsAuthorizedOrReadOnly,)
 
     def get_permissions(self):
@@ -196,15 +358,19 @@ class CommentViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         review_id = self.kwargs.get("review_id")
-        new_queryset = Comment.objects.filter(review=review_id)
+        new_queryset = Comment.objects.filter(
+            review=review_id
+        ).select_related("author")
         return new_queryset
 
     def perform_create(self, serializer):
         review = get_object_or_404(Review, pk=self.kwargs.get("review_id"))
-        serializer.save(
-            author=self.request.user,
-            review=review,
-        )
+        # Число комментариев отзыва сдвигается сигналом post_save.
+        with transaction.atomic():
+            serializer.save(
+                author=self.request.user,
+                review=review,
+            )
 
     def perform_update(self, serializer):
         if serializer.instance.author != self.request.user:
@@ -31,6 +31,7 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = "reviews.CustomUser"  # Кастомная модель по умолчанию
 
 MIDDLEWARE = [
+    "api.sql.SQLInstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -69,6 +70,19 @@ DATABASES = {
     }
 }
 
+# Версии ресурсов и токенов (reviews.versions) сверяют все процессы
+# сервера, поэтому кэш должен быть общим: таблица в базе (после
+# createcachetable) или memcached через CACHE_BACKEND/CACHE_LOCATION.
+# Память процесса (LocMemCache) допустима только при DEBUG, см. api.checks.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "yamdb_cache"),
+    }
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -105,13 +119,34 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.StatelessJWTAuthentication",
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
 }
 
+# Ограничение памяти кэша ответов каталога (api.cache)
+RESPONSE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Сколько секунд живёт закэшированный COUNT списков (api.pagination)
+COUNT_CACHE_TIMEOUT = 300
+
+# Мест в рейтингах лучших произведений (reviews.leaderboards)
+LEADERBOARD_SIZE = 100
+
+# Наибольший пакет для POST /api/v1/titles/bulk/ (api.bulk)
+TITLES_BULK_LIMIT = 1000
+
+# Подсчёт запросов к базе по HTTP-запросам (api.sql); дорог, поэтому
+# в эксплуатации включается только на время профилирования
+SQL_INSTRUMENTATION = DEBUG or os.getenv("SQL_INSTRUMENTATION") == "1"
+# Заголовки X-SQL-* с числом и временем запросов к базе (api.sql)
+SQL_DEBUG_HEADERS = DEBUG or os.getenv("SQL_DEBUG_HEADERS") == "1"
+# Запросы дольше этого порога пишутся в журнал вместе с SQL (без
+# параметров)
+SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", 500))
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=365),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=365),
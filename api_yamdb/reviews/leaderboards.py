@@ -0,0 +1,184 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import Category, Genre, LeaderboardEntry, Title
+
+ALL = "all"
+
+
+def board_size():
+    """Сколько мест показывается в рейтинге."""
+    return getattr(settings, "LEADERBOARD_SIZE", 100)
+
+
+def board_capacity():
+    # Запас мест, чтобы после падения рейтинга участника не пересобирать
+    # рейтинг каждый раз.
+    return board_size() * 2
+
+
+def category_board(category_id):
+    return f"category:{category_id}"
+
+
+def genre_board(genre_id):
+    return f"genre:{genre_id}"
+
+
+def rank(title_id, rating):
+    """Ключ сортировки: выше рейтинг, при равенстве - меньше id."""
+    return rating, -title_id
+
+
+def board_titles(board):
+    """Произведения с рейтингом, которые могут попасть в рейтинг board."""
+    titles = Title.objects.filter(rating__isnull=False)
+    kind, _, pk = board.partition(":")
+    if kind == "category":
+        titles = titles.filter(category_id=pk)
+    elif kind == "genre":
+        titles = titles.filter(genre__id=pk)
+    return titles
+
+
+def lock_boards(boards):
+    """Блокирует рейтинги до конца транзакции.
+
+    Изменение рейтинга - чтение, сравнение с последним местом и запись;
+    без блокировки два изменения на границе рейтинга теряют друг друга.
+    В PostgreSQL берутся advisory-блокировки в порядке имён, чтобы
+    не было взаимных блокировок; SQLite и так пишет последовательно.
+    """
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        for board in sorted(set(boards)):
+            cursor.execute(
+                "SELECT pg_advisory_xact_lock(hashtext(%s))", [board]
+            )
+
+
+def rebuild_board(board):
+    with transaction.atomic():
+        lock_boards([board])
+        LeaderboardEntry.objects.filter(board=board).delete()
+        LeaderboardEntry.objects.bulk_create(
+            LeaderboardEntry(board=board, title_id=pk, rating=rating)
+            for pk, rating in board_titles(board)
+            .order_by("-rating", "id")
+            .values_list("id", "rating")[:board_capacity()]
+        )
+
+
+def refill(boards):
+    """Дополняет рейтинги, из которых удалены места в обход
+    update_board (каскадное удаление, смена жанров и категории)."""
+    for board in boards:
+        with transaction.atomic():
+            lock_boards([board])
+            if (LeaderboardEntry.objects.filter(board=board).count()
+                    < board_size()):
+                rebuild_board(board)
+
+
+def rebuild_all():
+    """Полная пересборка всех рейтингов."""
+    boards = [
+        ALL,
+        *map(category_board, Category.objects.values_list("id", flat=True)),
+        *map(genre_board, Genre.objects.values_list("id", flat=True)),
+    ]
+    with transaction.atomic():
+        lock_boards(boards)
+        LeaderboardEntry.objects.exclude(board__in=boards).delete()
+        for board in boards:
+            rebuild_board(board)
+    return len(boards)
+
+
+def update_title(title_id):
+    """Обновляет рейтинги лучших после изменения произведения.
+
+    Держится инвариант: у любого произведения вне рейтинга ключ rank
+    не выше, чем у последнего места. Тогда достаточно прочитать
+    ограниченный рейтинг и сравнить с его последним местом; полная
+    пересборка нужна, только когда из полного рейтинга ушли места и их
+    стало меньше board_size().
+    """
+    title = (
+        Title.objects.filter(pk=title_id)
+        .values("rating", "category_id")
+        .first()
+    )
+    if title is None:
+        return
+    boards = [ALL, *map(genre_board, Title.genre.through.objects.filter(
+        title_id=title_id
+    ).values_list("genre_id", flat=True))]
+    if title["category_id"] is not None:
+        boards.append(category_board(title["category_id"]))
+
+    left = set(
+        LeaderboardEntry.objects.filter(title_id=title_id)
+        .exclude(board__in=boards)
+        .values_list("board", flat=True)
+    )
+    with transaction.atomic():
+        # Места читаются только после блокировки.
+        lock_boards([*boards, *left])
+        LeaderboardEntry.objects.filter(
+            title_id=title_id, board__in=left
+        ).delete()
+        entries = defaultdict(dict)
+        for board, pk, rating in LeaderboardEntry.objects.filter(
+            board__in=boards
+        ).values_list("board", "title_id", "rating"):
+            entries[board][pk] = rank(pk, rating)
+        for board in boards:
+            update_board(board, title_id, title["rating"], entries[board])
+        refill(left)
+
+
+def update_board(board, title_id, rating, ranks):
+    # Рейтинг короче board_size() только сразу после пересборки, значит
+    # в нём все произведения с оценкой.
+    complete = len(ranks) < board_size()
+    old = ranks.pop(title_id, None)
+    new = None if rating is None else rank(title_id, rating)
+    # Ниже последнего места (до изменения) могут быть произведения
+    # вне рейтинга.
+    keep = new is not None and (
+        complete or new >= min(ranks.values() if old is None
+                               else [*ranks.values(), old])
+    )
+    if not keep and old is None:
+        return
+
+    entries = LeaderboardEntry.objects.filter(board=board)
+    if keep and old is None:
+        LeaderboardEntry.objects.create(
+            board=board, title_id=title_id, rating=rating
+        )
+    elif keep and old != new:
+        entries.filter(title_id=title_id).update(rating=rating)
+    elif not keep and old is not None:
+        entries.filter(title_id=title_id).delete()
+    if keep:
+        ranks[title_id] = new
+
+    if len(ranks) > board_capacity():
+        last = min(ranks, key=ranks.get)
+        entries.filter(title_id=last).delete()
+    elif not complete and len(ranks) < board_size():
+        # Полный рейтинг потерял места, а ниже последнего места могут
+        # быть произведения вне рейтинга. Короткий рейтинг и так
+        # содержит все произведения с оценкой и остаётся полным.
+        rebuild_board(board)
+
+
+def top_titles(board):
+    return Title.objects.filter(leaderboard_entries__board=board).order_by(
+        "-leaderboard_entries__rating", "id"
+    )
@@ -0,0 +1,323 @@
+# Запуск: python manage.py generate_dataset --titles 1000000 --reviews 20000000
+#         --comments 50000000 --format csv --output /tmp/dataset
+
+import csv
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from multiprocessing import Pool
+
+from django.core.management import BaseCommand, CommandError, call_command
+
+CATEGORIES = ("Фильм", "Книга", "Музыка", "Сериал", "Игра", "Комикс")
+GENRES = (
+    ("Драма", "drama"), ("Комедия", "comedy"), ("Вестерн", "western"),
+    ("Фэнтези", "fantasy"), ("Фантастика", "sci-fi"),
+    ("Детектив", "detective"), ("Триллер", "thriller"),
+    ("Сказка", "tale"), ("Гонзо", "gonzo"), ("Роман", "roman"),
+    ("Баллада", "ballad"), ("Рок-н-ролл", "rock-n-roll"),
+    ("Классика", "classical"), ("Рок", "rock"), ("Шансон", "chanson"),
+    ("Ужасы", "horror"), ("Мелодрама", "melodrama"),
+    ("Документальный", "documentary"), ("Аниме", "anime"),
+    ("Мюзикл", "musical"),
+)
+ADJECTIVES = (
+    "Тихий", "Последний", "Красный", "Забытый", "Северный", "Вечный",
+    "Тёмный", "Золотой", "Одинокий", "Новый", "Старый", "Далёкий",
+)
+NOUNS = (
+    "дом", "берег", "город", "ветер", "сад", "поезд", "остров", "лес",
+    "маяк", "путь", "голос", "рассвет",
+)
+WORDS = (
+    "сюжет", "герой", "финал", "музыка", "атмосфера", "игра", "актёры",
+    "диалоги", "режиссура", "темп", "история", "мир", "образ", "стиль",
+    "неожиданно", "сильно", "скучно", "красиво", "честно", "ярко",
+)
+# Оценки смещены к высоким, как в реальных отзывах.
+SCORES = tuple(range(1, 11))
+SCORE_WEIGHTS = (1, 1, 2, 3, 5, 8, 12, 15, 12, 8)
+START_DATE = datetime(2015, 1, 1, tzinfo=timezone.utc)
+
+FILES = {
+    "users.csv": ("id", "username", "email", "role", "bio",
+                  "first_name", "last_name"),
+    "category.csv": ("id", "name", "slug"),
+    "genre.csv": ("id", "name", "slug"),
+    "titles.csv": ("id", "name", "year", "category"),
+    "genre_title.csv": ("id", "title_id", "genre_id"),
+    "review.csv": ("id", "title_id", "text", "author", "score", "pub_date"),
+    "comments.csv": ("id", "review_id", "text", "author", "pub_date"),
+}
+SHARDED = ("titles.csv", "genre_title.csv", "review.csv", "comments.csv")
+
+
+def genres_count(title_id):
+    return title_id % 3 + 1
+
+
+def split_evenly(total, parts):
+    """Делит total на parts почти равных целых частей."""
+    base, extra = divmod(total, parts)
+    return [base + (1 if i < extra else 0) for i in range(parts)]
+
+
+def redistribute(counts, allowed, total):
+    """Обнуляет количество на недопустимых позициях и делит недостающее
+    до total поровну между допустимыми."""
+    result = [count if ok else 0 for count, ok in zip(counts, allowed)]
+    targets = [i for i, ok in enumerate(allowed) if ok]
+    missing = total - sum(result)
+    if targets and missing > 0:
+        for i, extra in zip(targets, split_evenly(missing, len(targets))):
+            result[i] += extra
+    return result
+
+
+def popularity(titles, target, skew, rng):
+    """Распределение количества по произведениям по закону Ципфа.
+
+    Ранги перемешаны, чтобы популярные произведения не совпадали
+    с младшими id.
+    """
+    ranks = list(range(1, titles + 1))
+    rng.shuffle(ranks)
+    weights = [rank ** -skew for rank in ranks]
+    scale = target / sum(weights)
+    return [int(weight * scale + 0.5) for weight in weights]
+
+
+def text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def timestamp(rng):
+    moment = START_DATE + timedelta(seconds=rng.randrange(8 * 365 * 86400))
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def generate_shard(shard):
+    """Пишет части CSV для диапазона произведений.
+
+    Все id вычисляются заранее по префиксным суммам, поэтому части
+    не зависят друг от друга и могут создаваться параллельно.
+    """
+    rng = random.Random(shard["seed"])
+    users, categories = shard["users"], shard["categories"]
+    genres = len(GENRES)
+    paths = {
+        name: os.path.join(shard["directory"], f"{name}.{shard['index']:05d}")
+        for name in SHARDED
+    }
+    files = {name: open(path, "w", encoding="utf-8", newline="")
+             for name, path in paths.items()}
+    writers = {name: csv.writer(file) for name, file in files.items()}
+    genre_title_id = shard["genre_title_id"]
+    review_id = shard["review_id"]
+    comment_id = shard["comment_id"]
+    try:
+        for offset, title_id in enumerate(
+            range(shard["title_start"], shard["title_end"])
+        ):
+            writers["titles.csv"].writerow((
+                title_id,
+                f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {title_id}",
+                min(2022, int(rng.triangular(1900, 2022, 2015))),
+                rng.randint(1, categories),
+            ))
+            for genre_id in rng.sample(range(1, genres + 1),
+                                       genres_count(title_id)):
+                writers["genre_title.csv"].writerow(
+                    (genre_title_id, title_id, genre_id)
+                )
+                genre_title_id += 1
+
+            reviews = shard["reviews"][offset]
+            comments = split_evenly(shard["comments"][offset], reviews) \
+                if reviews else []
+            for author, review_comments in zip(
+                rng.sample(range(1, users + 1), reviews), comments
+            ):
+                writers["review.csv"].writerow((
+                    review_id, title_id, text(rng, rng.randint(5, 30)),
+                    author,
+                    rng.choices(SCORES, SCORE_WEIGHTS)[0],
+                    timestamp(rng),
+                ))
+                for _ in range(review_comments):
+                    writers["comments.csv"].writerow((
+                        comment_id, review_id, text(rng, rng.randint(3, 15)),
+                        rng.randint(1, users), timestamp(rng),
+                    ))
+                    comment_id += 1
+                review_id += 1
+    finally:
+        for file in files.values():
+            file.close()
+    return shard["index"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Генерация воспроизводимого набора данных заданного размера "
+        "с неравномерной популярностью произведений."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--titles", type=int, default=10000)
+        parser.add_argument("--reviews", type=int, default=200000)
+        parser.add_argument("--comments", type=int, default=500000)
+        parser.add_argument(
+            "--users",
+            type=int,
+            help="По умолчанию - не меньше отзывов у самого популярного "
+                 "произведения.",
+        )
+        parser.add_argument("--categories", type=int, default=3)
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=1.0,
+            help="Показатель закона Ципфа для популярности.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--format",
+            choices=("csv", "db"),
+            default="csv",
+            help="csv - файлы для import_csv, db - сразу загрузить в базу "
+                 "(каталог в базе будет очищен).",
+        )
+        parser.add_argument("--output", help="Каталог для CSV файлов.")
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count() or 1
+        )
+        parser.add_argument(
+            "--shard-size",
+            type=int,
+            default=10000,
+            help="Произведений в одной части.",
+        )
+
+    def handle(self, *args, **options):
+        if options["format"] == "csv" and not options["output"]:
+            raise CommandError("Для --format csv укажите --output.")
+        if not 1 <= options["categories"] <= len(CATEGORIES):
+            raise CommandError(
+                f"Категорий может быть от 1 до {len(CATEGORIES)}."
+            )
+        if options["format"] == "db":
+            self.stdout.write(self.style.WARNING(
+                "--format db загружает данные полным import_csv: "
+                "произведения, жанры, категории, отзывы и комментарии "
+                "в базе будут удалены."
+            ))
+        started = time.monotonic()
+        rng = random.Random(options["seed"])
+        titles = options["titles"]
+        reviews = popularity(titles, options["reviews"], options["skew"], rng)
+        users = options["users"] or max(reviews, default=0) + 1
+        # Один автор пишет не больше одного отзыва на произведение.
+        reviews = [min(count, users) for count in reviews]
+        # Комментарии произведений без отзывов достаются произведениям
+        # с отзывами, чтобы их было ровно --comments.
+        comments = redistribute(
+            popularity(titles, options["comments"], options["skew"], rng),
+            [count > 0 for count in reviews],
+            options["comments"],
+        )
+
+        directory = options["output"] or tempfile.mkdtemp()
+        os.makedirs(directory, exist_ok=True)
+        try:
+            self.write_static(directory, users, options["categories"])
+            shards = self.plan_shards(
+                directory, titles, reviews, comments, users, options
+            )
+            with Pool(options["workers"]) as pool:
+                for done, _ in enumerate(
+                    pool.imap_unordered(generate_shard, shards), 1
+                ):
+                    self.stdout.write(
+                        f"\rЧастей готово: {done}/{len(shards)}", ending=""
+                    )
+            self.stdout.write("")
+            self.merge(directory, len(shards))
+            self.stdout.write(
+                f"Произведений: {titles}, отзывов: {sum(reviews)}, "
+                f"комментариев: {sum(comments)}, пользователей: {users}, "
+                f"{time.monotonic() - started:.1f} с"
+            )
+            if options["format"] == "db":
+                self.load(directory)
+        finally:
+            if not options["output"]:
+                shutil.rmtree(directory)
+
+    def write_static(self, directory, users, categories):
+        rows = {
+            "users.csv": (
+                (i, f"user{i}", f"user{i}@yamdb.fake", "user", "", "", "")
+                for i in range(1, users + 1)
+            ),
+            "category.csv": (
+                (i, name, f"category-{i}")
+                for i, name in enumerate(CATEGORIES[:categories], 1)
+            ),
+            "genre.csv": (
+                (i, name, slug) for i, (name, slug) in enumerate(GENRES, 1)
+            ),
+        }
+        for name, data in rows.items():
+            with open(os.path.join(directory, name), "w",
+                      encoding="utf-8", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(FILES[name])
+                writer.writerows(data)
+
+    def plan_shards(self, directory, titles, reviews, comments, users,
+                    options):
+        size = options["shard_size"]
+        review_ids = list(accumulate(reviews, initial=1))
+        comment_ids = list(accumulate(comments, initial=1))
+        genre_title_ids = list(accumulate(
+            (genres_count(title_id) for title_id in range(1, titles + 1)),
+            initial=1,
+        ))
+        shards = []
+        for index, start in enumerate(range(0, titles, size)):
+            end = min(start + size, titles)
+            shards.append({
+                "index": index,
+                "seed": options["seed"] * 1000003 + index,
+                "directory": directory,
+                "users": users,
+                "categories": options["categories"],
+                "title_start": start + 1,
+                "title_end": end + 1,
+                "reviews": reviews[start:end],
+                "comments": comments[start:end],
+                "review_id": review_ids[start],
+                "comment_id": comment_ids[start],
+                "genre_title_id": genre_title_ids[start],
+            })
+        return shards
+
+    def merge(self, directory, shards):
+        for name in SHARDED:
+            with open(os.path.join(directory, name), "w",
+                      encoding="utf-8", newline="") as target:
+                csv.writer(target).writerow(FILES[name])
+                for index in range(shards):
+                    part = os.path.join(directory, f"{name}.{index:05d}")
+                    with open(part, encoding="utf-8", newline="") as source:
+                        shutil.copyfileobj(source, target, 1024 * 1024)
+                    os.remove(part)
+
+    def load(self, directory):
+        # users.csv import_csv загружает сам, до отзывов.
+        call_command("import_csv", path=directory, stdout=self.stdout)
@@ -0,0 +1,19 @@
+# Запуск: python manage.py rebuild_leaderboards
+
+import time
+
+from django.core.management import BaseCommand
+
+from reviews.leaderboards import rebuild_all
+
+
+class Command(BaseCommand):
+    help = "Полная пересборка рейтингов лучших произведений."
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        boards = rebuild_all()
+        self.stdout.write(self.style.SUCCESS(
+            f"Пересобрано рейтингов: {boards}, "
+            f"{time.monotonic() - started:.2f} с"
+        ))
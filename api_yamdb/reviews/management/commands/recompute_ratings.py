@@ -0,0 +1,106 @@
+# Запуск: python manage.py recompute_ratings --workers 4
+#         python manage.py recompute_ratings --category films --year 2000
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management import BaseCommand
+from django.db import connection
+from django.db.models import Max, Min
+
+from reviews.leaderboards import rebuild_all
+from reviews.models import Title
+from reviews.ratings import drifted_titles, fix_drifted, recalculate_scores
+from reviews.versions import bump_version
+
+
+def recompute_chunk(lookups, start, end):
+    """Пересчитывает рейтинг произведений из диапазона id.
+
+    Возвращает список (id, старый рейтинг, новый рейтинг) исправленных
+    произведений. Каждый диапазон - отдельная короткая транзакция,
+    чтобы не держать блокировку на всю таблицу.
+    """
+    try:
+        return fix_drifted(
+            Title.objects.filter(id__range=(start, end), **lookups),
+            drifted_titles,
+            recalculate_scores,
+            ("id", "rating", "expected_rating"),
+        )
+    finally:
+        # Каждый поток открывает своё соединение с базой.
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Пересчёт рейтинга произведений по отзывам."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ids", help="Список id произведений через запятую."
+        )
+        parser.add_argument("--category", help="Slug категории.")
+        parser.add_argument("--genre", help="Slug жанра.")
+        parser.add_argument("--year", type=int)
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Произведений в одной транзакции.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Число параллельно обрабатываемых диапазонов.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        lookups = {}
+        if options["ids"]:
+            lookups["id__in"] = [
+                int(pk) for pk in options["ids"].split(",") if pk.strip()
+            ]
+        if options["category"]:
+            lookups["category__slug"] = options["category"]
+        if options["genre"]:
+            lookups["genre__slug"] = options["genre"]
+        if options["year"] is not None:
+            lookups["year"] = options["year"]
+
+        bounds = Title.objects.filter(**lookups).aggregate(
+            first=Min("id"), last=Max("id")
+        )
+        first, last = bounds["first"] or 1, bounds["last"] or 0
+        size = options["chunk_size"]
+        chunks = [
+            (lookups, start, start + size - 1)
+            for start in range(first, last + 1, size)
+        ]
+        workers = options["workers"]
+        if connection.vendor == "sqlite":
+            # SQLite допускает только одну пишущую транзакцию.
+            workers = 1
+        with ThreadPoolExecutor(workers) as executor:
+            corrected = [
+                row
+                for rows in executor.map(
+                    lambda chunk: recompute_chunk(*chunk), chunks
+                )
+                for row in rows
+            ]
+
+        for pk, before, after in corrected[:50]:
+            self.stdout.write(f"id={pk}: {before} -> {after}")
+        if len(corrected) > 50:
+            self.stdout.write(f"... и ещё {len(corrected) - 50}")
+        if corrected:
+            rebuild_all()
+            bump_version("titles")
+        self.stdout.write(self.style.SUCCESS(
+            f"Проверено диапазонов: {len(chunks)}, "
+            f"исправлено произведений: {len(corrected)}, "
+            f"{time.monotonic() - started:.2f} с"
+        ))
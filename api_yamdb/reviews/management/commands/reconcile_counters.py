@@ -0,0 +1,91 @@
+# Запуск: python manage.py reconcile_counters --workers 4
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management import BaseCommand
+from django.db import connection
+from django.db.models import Max
+
+from reviews.leaderboards import rebuild_all
+from reviews.models import Review, Title
+from reviews.ratings import (
+    drifted_reviews,
+    drifted_titles,
+    fix_drifted,
+    recalculate_scores,
+    recount_comments,
+)
+from reviews.versions import bump_version
+
+# Модель, поиск расхождений, исправление.
+COUNTERS = (
+    (Title, drifted_titles, recalculate_scores),
+    (Review, drifted_reviews, recount_comments),
+)
+
+
+def reconcile_chunk(model, drifted, fix, start, end):
+    """Исправляет счётчики в диапазоне id, возвращает их id."""
+    try:
+        rows = fix_drifted(
+            model.objects.filter(id__range=(start, end)), drifted, fix
+        )
+        return [pk for pk, in rows]
+    finally:
+        # Каждый поток открывает своё соединение с базой.
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Сверка счётчиков отзывов и комментариев с данными."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=10000,
+            help="Строк в одной транзакции.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Число параллельно обрабатываемых диапазонов.",
+        )
+
+    def handle(self, *args, **options):
+        size = options["chunk_size"]
+        workers = options["workers"]
+        if connection.vendor == "sqlite":
+            # SQLite допускает только одну пишущую транзакцию.
+            workers = 1
+        fixed_titles = False
+        for model, drifted, fix in COUNTERS:
+            started = time.monotonic()
+            last_id = model.objects.aggregate(last=Max("id"))["last"] or 0
+            chunks = [
+                (model, drifted, fix, start, start + size - 1)
+                for start in range(1, last_id + 1, size)
+            ]
+            with ThreadPoolExecutor(workers) as executor:
+                fixed = [
+                    pk
+                    for ids in executor.map(
+                        lambda chunk: reconcile_chunk(*chunk), chunks
+                    )
+                    for pk in ids
+                ]
+            fixed_titles = fixed_titles or bool(fixed)
+            name = model._meta.verbose_name_plural
+            report = f"{name}: исправлено {len(fixed)}"
+            if fixed:
+                report += f" (id: {', '.join(map(str, fixed[:20]))}"
+                report += " ...)" if len(fixed) > 20 else ")"
+            self.stdout.write(
+                f"{report}, {time.monotonic() - started:.2f} с"
+            )
+        if fixed_titles:
+            rebuild_all()
+            bump_version("titles")
+        self.stdout.write(self.style.SUCCESS("Сверка завершена."))
@@ -0,0 +1,48 @@
+# Запуск: python manage.py send_emails [--loop]
+
+import time
+
+from django.core.management import BaseCommand
+
+from reviews.outbox import MAX_ATTEMPTS, send_pending
+
+
+class Command(BaseCommand):
+    help = "Отправка писем из очереди."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Писем за одно SMTP-соединение.",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=MAX_ATTEMPTS,
+            help="Попыток отправки одного письма.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Работать постоянно, опрашивая очередь.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Пауза между опросами пустой очереди, секунды.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent = send_pending(
+                options["batch_size"], options["max_attempts"]
+            )
+            if sent:
+                self.stdout.write(f"Отправлено писем: {sent}")
+            if not options["loop"]:
+                break
+            if sent < options["batch_size"]:
+                time.sleep(options["interval"])
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+from reviews.search import CREATE_FTS_SQL, DROP_FTS_SQL
+
+
+def run_sql(statements):
+    def operation(apps, schema_editor):
+        # FTS5 есть только в SQLite, на других СУБД поиск идёт по подстроке.
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_cursor_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sql(CREATE_FTS_SQL), run_sql(DROP_FTS_SQL)),
+    ]
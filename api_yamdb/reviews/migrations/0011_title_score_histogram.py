@@ -0,0 +1,40 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+SCORES = range(1, 11)
+
+
+def fill_histogram(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    reviews = Review.objects.filter(title=OuterRef('pk')).values('title')
+    Title.objects.update(**{
+        f'score_{score}': Coalesce(
+            Subquery(
+                reviews.filter(score=score)
+                .annotate(total=Count('id')).values('total')
+            ),
+            0,
+        )
+        for score in SCORES
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_review_comments_count'),
+    ]
+
+    operations = [
+        *(
+            migrations.AddField(
+                model_name='title',
+                name=f'score_{score}',
+                field=models.PositiveIntegerField(default=0, verbose_name=f'Оценок {score}'),
+            )
+            for score in SCORES
+        ),
+        migrations.RunPython(fill_histogram, migrations.RunPython.noop),
+    ]
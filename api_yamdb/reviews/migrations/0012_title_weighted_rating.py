@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_title_score_histogram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='weighted_rating',
+            field=models.FloatField(blank=True, db_index=True, null=True, verbose_name='Взвешенный рейтинг'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_lower',
+            field=models.FloatField(blank=True, null=True, verbose_name='Нижняя граница рейтинга'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_upper',
+            field=models.FloatField(blank=True, null=True, verbose_name='Верхняя граница рейтинга'),
+        ),
+    ]
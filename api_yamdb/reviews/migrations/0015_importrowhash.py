@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0014_leaderboardentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportRowHash',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=32, verbose_name='Файл')),
+                ('row_id', models.BigIntegerField(verbose_name='id строки')),
+                ('digest', models.CharField(max_length=32, verbose_name='Контрольная сумма')),
+            ],
+            options={
+                'verbose_name': 'Контрольная сумма строки импорта',
+                'verbose_name_plural': 'Контрольные суммы строк импорта',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='importrowhash',
+            constraint=models.UniqueConstraint(fields=('source', 'row_id'), name='unique_import_row'),
+        ),
+    ]
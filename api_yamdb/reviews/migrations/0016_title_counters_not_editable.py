@@ -0,0 +1,97 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0015_importrowhash'),
+    ]
+
+    # editable влияет только на формы и сериализаторы: схема не меняется,
+    # и на SQLite AlterField пересобирал бы таблицу на каждое поле.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='title',
+                    name='rating',
+                    field=models.IntegerField(blank=True, editable=False, null=True, verbose_name='Рейтинг произведения'),
+                ),
+                migrations.AlterField(
+                    model_name='title',
+                    name='weighted_rating',
+                    field=models.FloatField(blank=True, db_index=True, editable=False, null=True, verbose_name='Взвешенный рейтинг'),
+                ),
+                migrations.AlterField(
+                    model_name='title',
+                    name='rating_lower',
+                    field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Нижняя граница рейтинга'),
+                ),
+                migrations.AlterField(
+                    model_name='title',
+                    name='rating_upper',
+                    field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Верхняя граница рейтинга'),
+                ),
+                migrations.AlterField(
+                    model_name='title',
+                    name='score_sum',
+                    field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+                ),
+                migrations.AlterField(
+                    model_name='title',
+                    name='reviews_count',
+                    field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество отзывов'),
+                ),
+                migrations.AlterField(
+                    model_name='title',
+                    name='score_1',
+                    field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 1'),
+                ),
+                migrations.AlterField(
+                    model_name='title',
+                    name='score_2',
+                    field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 2'),
+                ),
+                migrations.AlterField(
+                    model_name='title',
+                    name='score_3',
+                    field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 3'),
+                ),
+                migrations.AlterField(
+                    model_name='title',
+                    name='score_4',
+                    field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 4'),
+                ),
+                migrations.AlterField(
+                    model_name='title',
+                    name='score_5',
+                    field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 5'),
+                ),
+                migrations.AlterField(
+                    model_name='title',
+                    name='score_6',
+                    field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 6'),
+                ),
+                migrations.AlterField(
+                    model_name='title',
+                    name='score_7',
+                    field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 7'),
+                ),
+                migrations.AlterField(
+                    model_name='title',
+                    name='score_8',
+                    field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 8'),
+                ),
+                migrations.AlterField(
+                    model_name='title',
+                    name='score_9',
+                    field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 9'),
+                ),
+                migrations.AlterField(
+                    model_name='title',
+                    name='score_10',
+                    field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 10'),
+                ),
+            ],
+        ),
+    ]
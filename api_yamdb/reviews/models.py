@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
+from django.utils import timezone
 
 from .validators import validate_year
 
@@ -33,6 +34,11 @@ class CustomUser(AbstractUser):
         default="user",
         max_length=255
     )
+    token_version = models.PositiveIntegerField(
+        "Версия токенов",
+        default=0,
+        help_text="Меняется при смене прав, старые токены перестают работать",
+    )
 
     class Meta:
         verbose_name = "Пользователь"
@@ -122,13 +128,127 @@ class Title(models.Model):
         related_name="titles",
         verbose_name="Категория произведения",
     )
+    # Счётчики и рейтинги меняются только атомарными UPDATE (сигналы
+    # отзывов, команды пересчёта), поэтому формы и сериализаторы их
+    # не записывают.
     rating = models.IntegerField(
         "Рейтинг произведения",
         blank=True,
         null=True,
+        editable=False,
+    )
+    # Байесовская оценка и её доверительный интервал, считает
+    # команда rank_titles.
+    weighted_rating = models.FloatField(
+        "Взвешенный рейтинг",
+        blank=True,
+        null=True,
+        db_index=True,
+        editable=False,
+    )
+    rating_lower = models.FloatField(
+        "Нижняя граница рейтинга",
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    rating_upper = models.FloatField(
+        "Верхняя граница рейтинга",
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    score_sum = models.PositiveIntegerField(
+        "Сумма оценок",
+        default=0,
+        editable=False,
+    )
+    reviews_count = models.PositiveIntegerField(
+        "Количество отзывов",
+        default=0,
+        editable=False,
+    )
+    # Распределение оценок: сколько отзывов с каждой оценкой.
+    score_1 = models.PositiveIntegerField(
+        "Оценок 1",
+        default=0,
+        editable=False,
+    )
+    score_2 = models.PositiveIntegerField(
+        "Оценок 2",
+        default=0,
+        editable=False,
+    )
+    score_3 = models.PositiveIntegerField(
+        "Оценок 3",
+        default=0,
+        editable=False,
+    )
+    score_4 = models.PositiveIntegerField(
+        "Оценок 4",
+        default=0,
+        editable=False,
+    )
+    score_5 = models.PositiveIntegerField(
+        "Оценок 5",
+        default=0,
+        editable=False,
+    )
+    score_6 = models.PositiveIntegerField(
+        "Оценок 6",
+        default=0,
+        editable=False,
+    )
+    score_7 = models.PositiveIntegerField(
+        "Оценок 7",
+        default=0,
+        editable=False,
+    )
+    score_8 = models.PositiveIntegerField(
+        "Оценок 8",
+        default=0,
+        editable=False,
+    )
+    score_9 = models.PositiveIntegerField(
+        "Оценок 9",
+        default=0,
+        editable=False,
+    )
+    score_10 = models.PositiveIntegerField(
+        "Оценок 10",
+        default=0,
+        editable=False,
+    )
+    modified = models.DateTimeField(
+        "Дата изменения",
+        auto_now=True,
     )
 
     class Meta:
+        # Индексы под ?ordering=: id в конце даёт однозначный порядок
+        # без сортировки во временной таблице.
+        indexes = [
+            models.Index(
+                name="title_rating_idx",
+                fields=("rating", "id"),
+            ),
+            models.Index(
+                name="title_category_rating_idx",
+                fields=("category", "rating", "id"),
+            ),
+            models.Index(
+                name="title_year_rating_idx",
+                fields=("year", "rating", "id"),
+            ),
+            models.Index(
+                name="title_name_idx",
+                fields=("name", "id"),
+            ),
+            models.Index(
+                name="title_reviews_count_idx",
+                fields=("reviews_count", "id"),
+            ),
+        ]
         verbose_name = "Произведение"
         verbose_name_plural = "Произведения"
 
@@ -174,6 +294,14 @@ class Review(models.Model):
         "Дата добавления",
         auto_now_add=True,
     )
+    modified = models.DateTimeField(
+        "Дата изменения",
+        auto_now=True,
+    )
+    comments_count = models.PositiveIntegerField(
+        "Количество комментариев",
+        default=0,
+    )
 
     class Meta:
         constraints = [
@@ -182,6 +310,16 @@ class Review(models.Model):
                 fields=("author", "title",),
             )
         ]
+        indexes = [
+            models.Index(
+                name="review_title_pub_date_idx",
+                fields=("title", "pub_date", "id"),
+            ),
+            models.Index(
+                name="review_title_modified_idx",
+                fields=("title", "modified"),
+            ),
+        ]
         verbose_name = "Отзыв"
         verbose_name_plural = "Отзывы"
 
@@ -209,10 +347,150 @@ class Comment(models.Model):
         "Дата добавления",
         auto_now_add=True,
     )
+    modified = models.DateTimeField(
+        "Дата изменения",
+        auto_now=True,
+    )
 
     class Meta:
+        indexes = [
+            models.Index(
+                name="comment_review_pub_date_idx",
+                fields=("review", "pub_date", "id"),
+            ),
+            models.Index(
+                name="comment_review_modified_idx",
+                fields=("review", "modified"),
+            ),
+        ]
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
 
     def __str__(self):
         return self.text
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку, см. reviews.outbox."""
+
+    subject = models.CharField(
+        "Тема",
+        max_length=255,
+    )
+    body = models.TextField(
+        "Текст письма",
+    )
+    from_email = models.CharField(
+        "Отправитель",
+        max_length=254,
+        blank=True,
+        null=True,
+    )
+    recipients = models.TextField(
+        "Получатели",
+        help_text="Адреса через запятую",
+    )
+    created = models.DateTimeField(
+        "Дата создания",
+        auto_now_add=True,
+    )
+    send_after = models.DateTimeField(
+        "Отправить не раньше",
+        default=timezone.now,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        "Попыток отправки",
+        default=0,
+    )
+    sent_at = models.DateTimeField(
+        "Дата отправки",
+        blank=True,
+        null=True,
+    )
+    last_error = models.TextField(
+        "Последняя ошибка",
+        blank=True,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                name="outgoing_email_pending_idx",
+                fields=("sent_at", "send_after"),
+            )
+        ]
+        verbose_name = "Исходящее письмо"
+        verbose_name_plural = "Исходящие письма"
+
+    def __str__(self):
+        return self.subject
+
+
+class LeaderboardEntry(models.Model):
+    """Место произведения в рейтинге лучших, см. reviews.leaderboards.
+
+    board - "all", "category:<id>" или "genre:<id>".
+    """
+
+    board = models.CharField(
+        "Рейтинг",
+        max_length=32,
+    )
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name="leaderboard_entries",
+        verbose_name="Произведение",
+    )
+    rating = models.IntegerField(
+        "Рейтинг произведения",
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name="unique_board_title",
+                fields=("board", "title"),
+            )
+        ]
+        indexes = [
+            models.Index(
+                name="leaderboard_board_rating_idx",
+                fields=("board", "-rating", "title"),
+            )
+        ]
+        verbose_name = "Место в рейтинге"
+        verbose_name_plural = "Места в рейтинге"
+
+    def __str__(self):
+        return f"{self.board}: {self.title_id}"
+
+
+class ImportRowHash(models.Model):
+    """Контрольная сумма строки CSV, загруженной import_csv.
+
+    По ней import_csv --incremental находит новые, изменённые
+    и удалённые строки.
+    """
+
+    source = models.CharField(
+        "Файл",
+        max_length=32,
+    )
+    row_id = models.BigIntegerField(
+        "id строки",
+    )
+    digest = models.CharField(
+        "Контрольная сумма",
+        max_length=32,
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name="unique_import_row",
+                fields=("source", "row_id"),
+            )
+        ]
+        verbose_name = "Контрольная сумма строки импорта"
+        verbose_name_plural = "Контрольные суммы строк импорта"
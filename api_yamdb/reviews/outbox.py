@@ -0,0 +1,81 @@
+import logging
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+BACKOFF_SECONDS = 60
+
+
+def enqueue_mail(subject, message, from_email, recipient_list):
+    """Ставит письмо в очередь вместо отправки во время запроса."""
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email,
+        recipients=",".join(recipient_list),
+    )
+
+
+def send_pending(batch_size=100, max_attempts=MAX_ATTEMPTS):
+    """Отправляет пачку писем через одно SMTP-соединение.
+
+    Неудачные письма откладываются с экспоненциальной задержкой, после
+    max_attempts попыток больше не отправляются. Рассчитано на один
+    рабочий процесс. Возвращает число отправленных писем.
+    """
+    emails = list(
+        OutgoingEmail.objects.filter(
+            sent_at__isnull=True,
+            attempts__lt=max_attempts,
+            send_after__lte=timezone.now(),
+        ).order_by("send_after", "id")[:batch_size]
+    )
+    if not emails:
+        return 0
+
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        for email in emails:
+            postpone(email, error)
+        return 0
+
+    sent = 0
+    try:
+        for email in emails:
+            message = EmailMessage(
+                email.subject,
+                email.body,
+                from_email=email.from_email,
+                to=email.recipients.split(","),
+                connection=connection,
+            )
+            try:
+                message.send()
+            except Exception as error:
+                postpone(email, error)
+            else:
+                email.attempts += 1
+                email.sent_at = timezone.now()
+                email.save(update_fields=["attempts", "sent_at"])
+                sent += 1
+    finally:
+        connection.close()
+    return sent
+
+
+def postpone(email, error):
+    logger.warning("Не удалось отправить письмо %s: %s", email.pk, error)
+    email.attempts += 1
+    email.last_error = str(error)
+    email.send_after = timezone.now() + timedelta(
+        seconds=BACKOFF_SECONDS * 2 ** (email.attempts - 1)
+    )
+    email.save(update_fields=["attempts", "last_error", "send_after"])
@@ -0,0 +1,93 @@
+import numpy as np
+from django.db import connection, transaction
+
+from .models import Review, Title
+from .ratings import SCORES
+
+SCORE_VALUES = np.arange(SCORES.start, SCORES.stop, dtype=np.float64)
+
+
+def load_histograms(fetch_size=100000):
+    """Матрица распределения оценок: строка - произведение, столбец - оценка.
+
+    Пары (title_id, score) сворачиваются в базе через GROUP BY, поэтому
+    в память приходит не больше десяти строк на произведение, а не
+    каждый отзыв. Два чтения не образуют снимок базы, поэтому отзывы
+    произведений, которых нет в ids, отбрасываются.
+    """
+    ids = np.fromiter(
+        Title.objects.order_by("id").values_list("id", flat=True).iterator(),
+        dtype=np.int64,
+    )
+    histograms = np.zeros((len(ids), len(SCORE_VALUES)), dtype=np.float64)
+    table = connection.ops.quote_name(Review._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT title_id, score, COUNT(*) FROM {table} "
+            f"GROUP BY title_id, score"
+        )
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            rows = np.array(rows, dtype=np.int64)
+            positions = np.searchsorted(ids, rows[:, 0])
+            # Произведения, созданные после чтения ids, пропускаются:
+            # для них нет строки в матрице.
+            present = positions < len(ids)
+            present[present] = ids[positions[present]] == rows[present, 0]
+            rows, positions = rows[present], positions[present]
+            histograms[positions, rows[:, 1] - SCORES.start] = rows[:, 2]
+    return ids, histograms
+
+
+def bayesian_ratings(histograms, prior_weight=10, prior_mean=None, z=1.96):
+    """Байесовское среднее и доверительный интервал для каждой строки.
+
+    Оценка стягивается к среднему по каталогу (prior_mean) с весом
+    prior_weight отзывов, поэтому одна десятка не обгоняет тысячи
+    девяток. Для произведений без отзывов возвращается NaN.
+    """
+    counts = histograms.sum(axis=1)
+    totals = histograms @ SCORE_VALUES
+    squares = histograms @ SCORE_VALUES ** 2
+    reviews = counts.sum()
+    if prior_mean is None:
+        prior_mean = totals.sum() / reviews if reviews else 0.0
+    prior_variance = (
+        squares.sum() / reviews - prior_mean ** 2 if reviews else 0.0
+    )
+
+    weight = prior_weight + counts
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = (prior_weight * prior_mean + totals) / weight
+        # Дисперсия с тем же априорным весом, что и среднее.
+        variance = (
+            prior_weight * (prior_variance + (prior_mean - mean) ** 2)
+            + squares - 2 * mean * totals + counts * mean ** 2
+        ) / weight
+        error = z * np.sqrt(np.clip(variance, 0, None) / weight)
+    lower = np.clip(mean - error, SCORE_VALUES[0], SCORE_VALUES[-1])
+    upper = np.clip(mean + error, SCORE_VALUES[0], SCORE_VALUES[-1])
+    empty = counts == 0
+    for values in (mean, lower, upper):
+        values[empty] = np.nan
+    return mean, lower, upper
+
+
+def store_ratings(ids, mean, lower, upper, chunk_size=10000):
+    """Записывает результат пачками UPDATE, по транзакции на пачку."""
+    table = connection.ops.quote_name(Title._meta.db_table)
+    sql = (
+        f"UPDATE {table} SET weighted_rating = %s, rating_lower = %s, "
+        f"rating_upper = %s WHERE id = %s"
+    )
+    rows = [
+        tuple(None if np.isnan(value) else round(float(value), 4)
+              for value in values) + (int(pk),)
+        for pk, *values in zip(ids, mean, lower, upper)
+    ]
+    for start in range(0, len(rows), chunk_size):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, rows[start:start + chunk_size])
+    return len(rows)
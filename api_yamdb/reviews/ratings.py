@@ -0,0 +1,153 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, NullIf
+from django.utils import timezone
+
+from . import leaderboards
+from .models import Comment, Review, Title
+
+
+def rating_expression(score_sum, reviews_count):
+    """Рейтинг - целая часть среднего, без отзывов - NULL."""
+    return score_sum / NullIf(reviews_count, Value(0))
+
+
+SCORES = range(1, 11)
+
+
+def score_field(score):
+    """Поле распределения оценок произведения для оценки score."""
+    return f"score_{score}"
+
+
+def change_title_score(title_id, score_delta, count_delta, histogram=()):
+    """Атомарно сдвигает сумму оценок и число отзывов произведения.
+
+    histogram - пары (оценка, изменение) для распределения оценок.
+    Работает за O(1) независимо от числа отзывов, заодно обновляет
+    рейтинги лучших. Вызывать в той же транзакции, что и запись отзыва.
+    """
+    score_sum = F("score_sum") + score_delta
+    reviews_count = F("reviews_count") + count_delta
+    Title.objects.filter(pk=title_id).update(
+        score_sum=score_sum,
+        reviews_count=reviews_count,
+        rating=rating_expression(score_sum, reviews_count),
+        modified=timezone.now(),
+        **{
+            score_field(score): F(score_field(score)) + delta
+            for score, delta in histogram
+        },
+    )
+    leaderboards.update_title(title_id)
+
+
+def change_comments_count(review_id, delta):
+    """Атомарно сдвигает число комментариев отзыва."""
+    Review.objects.filter(pk=review_id).update(
+        comments_count=F("comments_count") + delta,
+        modified=timezone.now(),
+    )
+
+
+def actual_scores():
+    """Сумма оценок и число отзывов произведения по таблице отзывов."""
+    reviews = Review.objects.filter(title=OuterRef("pk")).values("title")
+    score_sum = Coalesce(
+        Subquery(reviews.annotate(total=Sum("score")).values("total")), 0
+    )
+    reviews_count = Coalesce(
+        Subquery(reviews.annotate(total=Count("id")).values("total")), 0
+    )
+    return score_sum, reviews_count
+
+
+def actual_comments_count():
+    comments = Comment.objects.filter(review=OuterRef("pk")).values("review")
+    return Coalesce(
+        Subquery(comments.annotate(total=Count("id")).values("total")), 0
+    )
+
+
+def actual_histogram():
+    reviews = Review.objects.filter(title=OuterRef("pk")).values("title")
+    return {
+        score_field(score): Coalesce(
+            Subquery(
+                reviews.filter(score=score)
+                .annotate(total=Count("id"))
+                .values("total")
+            ),
+            0,
+        )
+        for score in SCORES
+    }
+
+
+def recalculate_scores(titles=None):
+    """Пересчитывает сумму оценок, число отзывов, распределение оценок
+    и рейтинг одним UPDATE.
+
+    Нужен после массовой загрузки отзывов в обход ReviewViewSet.
+    """
+    if titles is None:
+        titles = Title.objects.all()
+    score_sum, reviews_count = actual_scores()
+    return titles.update(
+        score_sum=score_sum,
+        reviews_count=reviews_count,
+        rating=rating_expression(score_sum, reviews_count),
+        **actual_histogram(),
+    )
+
+
+def recount_comments(reviews=None):
+    """Пересчитывает число комментариев отзывов одним UPDATE."""
+    if reviews is None:
+        reviews = Review.objects.all()
+    return reviews.update(comments_count=actual_comments_count())
+
+
+def drifted_titles(titles):
+    """Произведения, у которых счётчики или рейтинг разошлись с отзывами.
+
+    Правильный рейтинг доступен в аннотации expected_rating.
+    """
+    score_sum, reviews_count = actual_scores()
+    return titles.annotate(
+        actual_sum=score_sum,
+        actual_count=reviews_count,
+        expected_rating=rating_expression(
+            F("actual_sum"), F("actual_count")
+        ),
+        # NULL не равен NULL, поэтому рейтинги сравниваются через -1.
+        stored_rating=Coalesce("rating", -1),
+        actual_rating=Coalesce("expected_rating", -1),
+    ).exclude(
+        score_sum=F("actual_sum"),
+        reviews_count=F("actual_count"),
+        stored_rating=F("actual_rating"),
+    )
+
+
+def drifted_reviews(reviews):
+    """Отзывы, у которых счётчик разошёлся с комментариями."""
+    return reviews.annotate(actual=actual_comments_count()).exclude(
+        comments_count=F("actual")
+    )
+
+
+def fix_drifted(queryset, drifted, fix, fields=("id",)):
+    """Находит и исправляет расхождения в queryset одной транзакцией.
+
+    drifted - drifted_titles или drifted_reviews, fix - функция
+    пересчёта. Возвращает значения fields исправленных строк, прочитанные
+    до исправления; первым должен идти id.
+    """
+    with transaction.atomic():
+        rows = list(drifted(queryset).values_list(*fields))
+        if rows:
+            fix(queryset.model.objects.filter(
+                id__in=[row[0] for row in rows]
+            ))
+    return rows
@@ -0,0 +1,117 @@
+import re
+
+from django.db import connection, connections
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "reviews_title_fts"
+
+CREATE_FTS_SQL = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, description, content='reviews_title', content_rowid='id'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert
+    AFTER INSERT ON reviews_title BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete
+    AFTER DELETE ON reviews_title BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update
+    AFTER UPDATE OF name, description ON reviews_title BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+)
+
+DROP_FTS_SQL = (
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_delete",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_update",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+)
+
+
+FTS_TRIGGERS = (
+    f"{FTS_TABLE}_insert",
+    f"{FTS_TABLE}_delete",
+    f"{FTS_TABLE}_update",
+)
+
+_fts_found = False
+
+
+def ensure_fts_index(using="default", **kwargs):
+    """Восстанавливает триггеры индекса после миграций.
+
+    SQLite пересоздаёт reviews_title при изменении схемы, и триггеры
+    удаляются вместе со старой таблицей. Обработчик post_migrate.
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    tables = connection.introspection.table_names()
+    if FTS_TABLE not in tables or "reviews_title" not in tables:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master "
+            "WHERE type = 'trigger' AND name IN (%s, %s, %s)",
+            FTS_TRIGGERS,
+        )
+        if cursor.fetchone()[0] == len(FTS_TRIGGERS):
+            return
+        for statement in CREATE_FTS_SQL:
+            cursor.execute(statement)
+
+
+def fts_available():
+    """Полнотекстовый индекс есть только в SQLite с FTS5."""
+    global _fts_found
+    if not _fts_found and connection.vendor == "sqlite":
+        _fts_found = FTS_TABLE in connection.introspection.table_names()
+    return _fts_found
+
+
+def build_match_query(text):
+    """Превращает ввод пользователя в безопасный префиксный запрос FTS5."""
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+
+
+def search_titles(queryset, text):
+    """Фильтрует произведения по индексу и сортирует по релевантности.
+
+    Возвращает None, если индексом воспользоваться нельзя.
+    """
+    match = build_match_query(text)
+    if not match or not fts_available():
+        return None
+    table = queryset.model._meta.db_table
+    # RawSQL внутри __in оборачивается в скобки и превращается в скалярный
+    # подзапрос, поэтому условие по индексу задаётся через extra().
+    return queryset.extra(
+        where=(
+            f"{table}.id IN (SELECT rowid FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s)",
+        ),
+        params=(match,),
+    ).annotate(
+        search_rank=RawSQL(
+            f"SELECT bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id",
+            (match,),
+        )
+    ).order_by("search_rank", "id")
@@ -0,0 +1,201 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from . import leaderboards
+from .models import (
+    Category,
+    Comment,
+    CustomUser,
+    Genre,
+    LeaderboardEntry,
+    Review,
+    Title,
+)
+from .ratings import change_comments_count, change_title_score
+from .versions import bump_version, forget_token_version
+
+# Поля, которые попадают в токен и проверяются правами доступа.
+TOKEN_FIELDS = ("username", "role", "is_staff", "is_superuser", "is_active")
+
+
+@receiver((post_save, post_delete), sender=Title)
+def title_changed(sender, **kwargs):
+    bump_version("titles")
+    # Ответ, закэшированный другим процессом до фиксации, устареет.
+    transaction.on_commit(lambda: bump_version("titles"))
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, **kwargs):
+    # Категория могла смениться - рейтинги лучших тоже.
+    leaderboards.update_title(instance.pk)
+
+
+@receiver(pre_delete, sender=Title)
+def title_deleting(sender, instance, **kwargs):
+    # Места удаляются каскадом, без update_board.
+    instance._boards = list(
+        LeaderboardEntry.objects.filter(title_id=instance.pk)
+        .values_list("board", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Title)
+def title_deleted(sender, instance, **kwargs):
+    leaderboards.refill(instance.__dict__.pop("_boards", ()))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, **kwargs):
+    if action.startswith("post_"):
+        bump_version("titles")
+        transaction.on_commit(lambda: bump_version("titles"))
+        if not reverse:
+            leaderboards.update_title(instance.pk)
+
+
+@receiver((post_save, post_delete), sender=Genre)
+def genre_changed(sender, **kwargs):
+    bump_version("genres", "titles")
+    # Справочник reviews.slugs мог перечитать таблицу до фиксации.
+    transaction.on_commit(lambda: bump_version("genres"))
+
+
+@receiver(post_delete, sender=Genre)
+def genre_deleted(sender, instance, **kwargs):
+    LeaderboardEntry.objects.filter(
+        board=leaderboards.genre_board(instance.pk)
+    ).delete()
+
+
+@receiver((post_save, post_delete), sender=Category)
+def category_changed(sender, **kwargs):
+    bump_version("categories", "titles")
+    # Справочник reviews.slugs мог перечитать таблицу до фиксации.
+    transaction.on_commit(lambda: bump_version("categories"))
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    LeaderboardEntry.objects.filter(
+        board=leaderboards.category_board(instance.pk)
+    ).delete()
+
+
+@receiver((post_save, post_delete), sender=Review)
+def review_changed(sender, **kwargs):
+    # Отзыв меняет рейтинг произведения.
+    bump_version("reviews", "titles")
+    transaction.on_commit(lambda: bump_version("reviews", "titles"))
+
+
+@receiver((post_save, post_delete), sender=Comment)
+def comment_changed(sender, **kwargs):
+    # В списке отзывов выводится comments_count.
+    bump_version("comments", "reviews")
+    transaction.on_commit(lambda: bump_version("comments", "reviews"))
+
+
+# Счётчики меняются только по сигналам, чтобы учесть записи в обход
+# API (shell, скрипты) и каскадное удаление (например, вместе
+# с пользователем). Запись отзыва и сдвиг счётчиков должны идти в одной
+# транзакции.
+@receiver(pre_save, sender=Review)
+def review_saving(sender, instance, **kwargs):
+    instance._stored_score = (
+        Review.objects.filter(pk=instance.pk)
+        .values_list("title_id", "score")
+        .first()
+        if instance.pk is not None
+        else None
+    )
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    stored = instance.__dict__.pop("_stored_score", None)
+    current = (instance.title_id, instance.score)
+    if created or stored is None:
+        change_title_score(
+            instance.title_id, instance.score, 1, [(instance.score, 1)]
+        )
+    elif stored[0] != instance.title_id:
+        title_id, score = stored
+        change_title_score(title_id, -score, -1, [(score, -1)])
+        change_title_score(
+            instance.title_id, instance.score, 1, [(instance.score, 1)]
+        )
+    elif stored != current:
+        score = stored[1]
+        change_title_score(
+            instance.title_id,
+            instance.score - score,
+            0,
+            [(score, -1), (instance.score, 1)],
+        )
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    change_title_score(
+        instance.title_id, -instance.score, -1, [(instance.score, -1)]
+    )
+
+
+@receiver(pre_save, sender=Comment)
+def comment_saving(sender, instance, **kwargs):
+    instance._stored_review = (
+        Comment.objects.filter(pk=instance.pk)
+        .values_list("review_id", flat=True)
+        .first()
+        if instance.pk is not None
+        else None
+    )
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    stored = instance.__dict__.pop("_stored_review", None)
+    if created or stored is None:
+        change_comments_count(instance.review_id, 1)
+    elif stored != instance.review_id:
+        change_comments_count(stored, -1)
+        change_comments_count(instance.review_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    change_comments_count(instance.review_id, -1)
+
+
+@receiver(pre_save, sender=CustomUser)
+def revoke_stale_tokens(sender, instance, **kwargs):
+    """Отзывает выданные токены, если изменились данные из них."""
+    if instance.pk is None:
+        return
+    stored = (
+        CustomUser.objects.filter(pk=instance.pk)
+        .values_list(*TOKEN_FIELDS)
+        .first()
+    )
+    current = tuple(getattr(instance, field) for field in TOKEN_FIELDS)
+    if stored is not None and stored != current:
+        # Отдельным UPDATE, чтобы версия сохранилась и при update_fields.
+        CustomUser.objects.filter(pk=instance.pk).update(
+            token_version=F("token_version") + 1
+        )
+        instance.token_version += 1
+
+
+@receiver((post_save, post_delete), sender=CustomUser)
+def user_changed(sender, instance, **kwargs):
+    forget_token_version(instance.pk)
+    bump_version("users")
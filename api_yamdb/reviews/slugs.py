@@ -0,0 +1,75 @@
+import threading
+from collections import namedtuple
+
+from .models import Category, Genre
+from .versions import get_version
+
+
+# Состояние справочника: версия ресурса и словари slug -> объект,
+# id -> объект.
+Snapshot = namedtuple("Snapshot", "version by_slug by_id")
+EMPTY = Snapshot(None, {}, {})
+
+
+class SlugDirectory:
+    """Справочник slug -> объект в памяти процесса.
+
+    Жанров и категорий немного, и меняются они редко, поэтому таблица
+    читается целиком. Актуальность проверяется по версии ресурса из
+    reviews.versions: сигналы меняют её при каждой записи. Версии
+    хранятся в общем кэше (CACHES), поэтому запись в одном процессе
+    заставляет остальные перечитать таблицу при следующем обращении.
+    С кэшем в памяти процесса справочники других процессов устаревают.
+    """
+
+    def __init__(self, model, resource):
+        self.model = model
+        self.resource = resource
+        self.lock = threading.Lock()
+        self.state = EMPTY
+
+    def __deepcopy__(self, memo):
+        # Поля DRF копируются вместе с аргументами, а справочник должен
+        # остаться общим.
+        return self
+
+    def load(self):
+        """Актуальный Snapshot; версия читается из кэша при каждом
+        вызове, поэтому для многих объектов подряд снимок стоит взять
+        один раз."""
+        version = get_version(self.resource)
+        state = self.state
+        if state.version != version:
+            with self.lock:
+                state = self.state
+                if state.version != version:
+                    objects = list(self.model.objects.order_by("id"))
+                    state = Snapshot(
+                        version,
+                        {obj.slug: obj for obj in objects},
+                        {obj.pk: obj for obj in objects},
+                    )
+                    self.state = state
+        return state
+
+    def forget(self):
+        with self.lock:
+            self.state = EMPTY
+
+    def by_slug(self, slug):
+        return self.load().by_slug.get(slug)
+
+    def by_id(self, pk):
+        return self.load().by_id.get(pk)
+
+    def id_map(self):
+        return {slug: obj.pk for slug, obj in self.load().by_slug.items()}
+
+    def ids(self, slugs):
+        """id известных slug-ов; неизвестные пропускаются."""
+        by_slug = self.load().by_slug
+        return [by_slug[slug].pk for slug in slugs if slug in by_slug]
+
+
+genres = SlugDirectory(Genre, "genres")
+categories = SlugDirectory(Category, "categories")
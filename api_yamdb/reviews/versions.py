@@ -0,0 +1,62 @@
+import time
+
+from django.core.cache import cache
+from django.utils import timezone
+
+VERSION_KEY = "resource-version:{}"
+MODIFIED_KEY = "resource-modified:{}"
+TOKEN_VERSION_KEY = "token-version:{}"
+
+
+def get_version(resource):
+    """Текущая версия ресурса, меняется при каждой записи.
+
+    Начальное значение берётся от времени, чтобы после вытеснения ключа
+    из кэша версия не совпала с уже выданной.
+    """
+    return cache.get_or_set(
+        VERSION_KEY.format(resource), time.time_ns(), timeout=None
+    )
+
+
+def get_last_modified(resource):
+    """Время последней записи в ресурс или None, если оно неизвестно."""
+    return cache.get(MODIFIED_KEY.format(resource))
+
+
+def bump_version(*resources):
+    now = timezone.now()
+    for resource in resources:
+        key = VERSION_KEY.format(resource)
+        if not cache.add(key, time.time_ns(), timeout=None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Ключ вытеснили между add и incr.
+                cache.set(key, time.time_ns(), timeout=None)
+        cache.set(MODIFIED_KEY.format(resource), now, timeout=None)
+
+
+def get_token_version(user_id):
+    """Версия токенов активного пользователя или None.
+
+    Читается из кэша, в базу идёт только при промахе.
+    """
+    from .models import CustomUser
+
+    key = TOKEN_VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = (
+            CustomUser.objects.filter(pk=user_id, is_active=True)
+            .values_list("token_version", flat=True)
+            .first()
+        )
+        # Отсутствие пользователя тоже кэшируется, как -1.
+        version = -1 if version is None else version
+        cache.set(key, version, timeout=None)
+    return None if version == -1 else version
+
+
+def forget_token_version(user_id):
+    cache.delete(TOKEN_VERSION_KEY.format(user_id))
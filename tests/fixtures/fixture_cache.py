@@ -0,0 +1,20 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_caches(settings):
+    # Тесты идут в одном процессе, поэтому общий кэш заменяется памятью
+    # процесса: запросы к таблице кэша не смешиваются с замеряемыми.
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    # Между тестами база очищается без сигналов, поэтому версии ресурсов
+    # и закэшированные ответы сбрасываются вручную.
+    from django.core.cache import cache
+
+    from api.cache import response_cache
+
+    cache.clear()
+    response_cache.clear()
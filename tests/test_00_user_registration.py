@@ -2,6 +2,8 @@ import pytest
 from django.contrib.auth import get_user_model
 from django.core import mail
 
+from reviews.outbox import send_pending
+
 User = get_user_model()
 
 
@@ -85,6 +87,7 @@ class Test00UserRegistration:
         }
         request_type = 'POST'
         response = client.post(self.url_signup, data=valid_data)
+        send_pending()  # письма отправляются из очереди
         outbox_after = mail.outbox  # email outbox after user create
 
         assert response.status_code != 404, (
@@ -132,6 +135,7 @@ class Test00UserRegistration:
         }
         request_type = 'POST'
         response = admin_client.post(self.url_admin_create_user, data=valid_data)
+        send_pending()
         outbox_after = mail.outbox
 
         assert response.status_code != 404, (
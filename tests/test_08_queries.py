@@ -0,0 +1,94 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews import slugs
+from reviews.models import Category, Genre, Title
+
+
+def create_catalog(size):
+    Category.objects.bulk_create(
+        Category(name=f'Категория {i}', slug=f'category-{i}') for i in range(3)
+    )
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {i}', slug=f'genre-{i}') for i in range(4)
+    )
+    categories = list(Category.objects.order_by('id'))
+    genres = list(Genre.objects.order_by('id'))
+    Title.objects.bulk_create(
+        Title(
+            name=f'Произведение {i}',
+            year=1990 + i % 30,
+            category=categories[i % len(categories)],
+        )
+        for i in range(size)
+    )
+    through = Title.genre.through
+    through.objects.bulk_create(
+        through(title_id=title_id, genre_id=genres[i % len(genres)].id)
+        for i, title_id in enumerate(
+            Title.objects.order_by('id').values_list('id', flat=True)
+        )
+    )
+    return categories, genres
+
+
+def warm_directories():
+    # Справочники жанров и категорий читаются один раз на процесс.
+    slugs.genres.load()
+    slugs.categories.load()
+
+
+def count_queries(client, url):
+    # Количество кэшируется, замеряется запрос с холодным кэшем.
+    cache.clear()
+    warm_directories()
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что при GET запросе `{url}` возвращается статус 200'
+    )
+    return len(context.captured_queries), response.json()
+
+
+class Test08TitleQueries:
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('query', [
+        '',
+        '&year=1995',
+        '&category=category-1',
+        '&genre=genre-2',
+        '&name=Произведение&category=category-0',
+    ])
+    def test_01_title_list_constant_queries(self, client, query):
+        create_catalog(150)
+        counts = set()
+        for limit in (1, 10, 100):
+            queries, data = count_queries(
+                client, f'/api/v1/titles/?limit={limit}{query}'
+            )
+            assert data['results'], (
+                'Проверьте, что при GET запросе `/api/v1/titles/` '
+                'возвращаются произведения'
+            )
+            assert all(title['category'] for title in data['results'])
+            assert all(title['genre'] for title in data['results'])
+            counts.add(queries)
+        assert len(counts) == 1 and counts.pop() <= 3, (
+            'Проверьте, что количество запросов к базе данных при GET запросе '
+            '`/api/v1/titles/` не зависит от размера страницы'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_title_detail_queries(self, client, django_assert_max_num_queries):
+        create_catalog(5)
+        title = Title.objects.first()
+        warm_directories()
+        with django_assert_max_num_queries(2):
+            response = client.get(f'/api/v1/titles/{title.id}/')
+        assert response.status_code == 200, (
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/` '
+            'возвращается статус 200'
+        )
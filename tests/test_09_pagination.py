@@ -0,0 +1,62 @@
+import pytest
+from django.contrib.auth import get_user_model
+
+from reviews.models import Review, Title
+
+
+def create_title_reviews(size):
+    title = Title.objects.create(name='Произведение', year=2000)
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(username=f'user{i}', email=f'user{i}@yamdb.fake')
+        for i in range(size)
+    )
+    Review.objects.bulk_create(
+        Review(title=title, author=author, text='Текст', score=5)
+        for author in User.objects.order_by('id')
+    )
+    return title
+
+
+class Test09CursorPagination:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_reviews_cursor_walk(self, client):
+        title = create_title_reviews(25)
+        url = f'/api/v1/titles/{title.id}/reviews/?pagination=cursor&limit=10'
+        response = client.get(url)
+        assert response.status_code == 200
+        data = response.json()
+        assert 'count' not in data, (
+            'Проверьте, что в курсорном режиме не выполняется подсчёт `count`'
+        )
+        assert data['previous'] is None
+        seen = [review['id'] for review in data['results']]
+        pages = [list(seen)]
+        while data['next']:
+            data = client.get(data['next']).json()
+            pages.append([review['id'] for review in data['results']])
+            seen.extend(pages[-1])
+        assert seen == list(
+            Review.objects.order_by('pub_date', 'id').values_list('id', flat=True)
+        ), (
+            'Проверьте, что курсорная пагинация `/api/v1/titles/{title_id}/reviews/` '
+            'возвращает все отзывы ровно один раз в порядке `(pub_date, id)`'
+        )
+        assert [len(page) for page in pages] == [10, 10, 5]
+        previous = client.get(data['previous']).json()
+        assert [review['id'] for review in previous['results']] == pages[1], (
+            'Проверьте, что ссылка `previous` в курсорном режиме '
+            'ведёт на предыдущую страницу'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_limit_offset_kept(self, client):
+        title = create_title_reviews(3)
+        response = client.get(f'/api/v1/titles/{title.id}/reviews/?limit=2')
+        data = response.json()
+        assert data['count'] == 3 and len(data['results']) == 2, (
+            'Проверьте, что формат пагинации limit/offset сохранён по умолчанию'
+        )
+        response = client.get(f'/api/v1/titles/{title.id}/reviews/?cursor=bad')
+        assert response.status_code == 404
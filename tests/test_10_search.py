@@ -0,0 +1,38 @@
+import pytest
+
+from reviews.models import Title
+
+
+def found_names(client, query):
+    response = client.get(f'/api/v1/titles/?{query}')
+    assert response.status_code == 200
+    return [title['name'] for title in response.json()['results']]
+
+
+class Test10TitleSearch:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_full_text_search(self, client):
+        Title.objects.create(name='Поворот туда', year=2000, description='Пике')
+        Title.objects.create(name='Проект', year=2001, description='Крутой поворот')
+        Title.objects.create(name='Другое', year=2002)
+        assert sorted(found_names(client, 'name=поворот')) == [
+            'Поворот туда', 'Проект'
+        ], (
+            'Проверьте, что фильтр `name` ищет по названию и описанию '
+            'без учёта регистра'
+        )
+        assert found_names(client, 'name=поворот&name_mode=substring') == [], (
+            'Проверьте, что `name_mode=substring` ищет по подстроке названия'
+        )
+
+        title = Title.objects.get(name='Другое')
+        title.name = 'Новый поворот'
+        title.save()
+        assert 'Новый поворот' in found_names(client, 'name=поворот'), (
+            'Проверьте, что индекс обновляется при изменении произведения'
+        )
+        title.delete()
+        assert 'Новый поворот' not in found_names(client, 'name=поворот'), (
+            'Проверьте, что индекс обновляется при удалении произведения'
+        )
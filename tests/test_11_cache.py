@@ -0,0 +1,88 @@
+import os
+
+import pytest
+from django.db import transaction
+
+from api.cache import ResponseCache, response_cache
+from reviews.models import Genre, Title
+from reviews.versions import get_version
+
+
+class Test11ResponseCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_list_cached_until_write(self, client):
+        Title.objects.create(name='Произведение', year=2000)
+        response = client.get('/api/v1/titles/')
+        assert response['X-Cache'] == 'MISS'
+        response = client.get('/api/v1/titles/')
+        assert response['X-Cache'] == 'HIT', (
+            'Проверьте, что повторный GET запрос `/api/v1/titles/` '
+            'отдаётся из кэша'
+        )
+        assert response.json()['count'] == 1
+        assert response_cache.stats()['hits'] == 1
+
+        Title.objects.create(name='Ещё одно', year=2001)
+        response = client.get('/api/v1/titles/')
+        assert response['X-Cache'] == 'MISS' and response.json()['count'] == 2, (
+            'Проверьте, что запись в произведения сбрасывает кэш списка'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_genre_change_invalidates_titles(self, client):
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        title = Title.objects.create(name='Произведение', year=2000)
+        title.genre.add(genre)
+        client.get(f'/api/v1/titles/{title.id}/')
+        genre.name = 'Трагедия'
+        genre.save()
+        response = client.get(f'/api/v1/titles/{title.id}/')
+        assert response.json()['genre'][0]['name'] == 'Трагедия', (
+            'Проверьте, что изменение жанра сбрасывает кэш произведений'
+        )
+
+    def test_03_lru_eviction(self):
+        cache = ResponseCache(max_bytes=30)
+        cache.set('a', 'x' * 10)
+        cache.set('b', 'x' * 10)
+        assert cache.get('a') is not None
+        cache.set('c', 'x' * 10)
+        assert cache.get('b') is None, (
+            'Проверьте, что при превышении лимита вытесняется '
+            'давно не использованная запись'
+        )
+        assert cache.get('a') is not None and cache.get('c') is not None
+        stats = cache.stats()
+        assert stats['evictions'] == 1 and stats['bytes'] <= 30
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_version_bumped_after_commit(self):
+        with transaction.atomic():
+            Title.objects.create(name='Произведение', year=2000)
+            # Другой процесс успевает закэшировать ещё старые данные.
+            version = get_version('titles')
+        assert get_version('titles') != version, (
+            'Проверьте, что версия произведений меняется и после '
+            'фиксации транзакции'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_stats_endpoint(self, client, user_client, admin_client):
+        assert client.get('/api/v1/cache-stats/').status_code == 401
+        assert user_client.get('/api/v1/cache-stats/').status_code == 403
+        client.get('/api/v1/genres/')
+        client.get('/api/v1/genres/')
+        response = admin_client.get('/api/v1/cache-stats/')
+        assert response.status_code == 200
+        assert response.json()['hits'] == 1, (
+            'Проверьте, что `/api/v1/cache-stats/` отдаёт статистику '
+            'кэша ответов'
+        )
+        assert response.json()['pid'] == os.getpid(), (
+            'Проверьте, что `/api/v1/cache-stats/` указывает процесс, '
+            'к которому относится статистика'
+        )
+        assert admin_client.delete('/api/v1/cache-stats/').status_code \
+            == 204
+        assert response_cache.stats()['entries'] == 0
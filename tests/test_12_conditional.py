@@ -0,0 +1,60 @@
+import pytest
+
+from reviews.models import Review, Title
+
+
+class Test12ConditionalGet:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title_etag(self, client, django_assert_max_num_queries):
+        title = Title.objects.create(name='Произведение', year=2000)
+        urls = {'/api/v1/titles/': 0, f'/api/v1/titles/{title.id}/': 0}
+        for url, queries in urls.items():
+            response = client.get(url)
+            assert response.status_code == 200
+            assert response.has_header('ETag') and response.has_header(
+                'Last-Modified'
+            ), f'Проверьте, что GET запрос `{url}` возвращает ETag и Last-Modified'
+            with django_assert_max_num_queries(queries):
+                response = client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag']
+                )
+            assert response.status_code == 304, (
+                f'Проверьте, что GET запрос `{url}` с актуальным If-None-Match '
+                'возвращает статус 304'
+            )
+            with django_assert_max_num_queries(queries):
+                response = client.get(url)
+            assert response.status_code == 200, (
+                f'Проверьте, что GET запрос `{url}` с тёплым кэшем '
+                'отдаётся из кэша без запросов к базе'
+            )
+        etags = {url: client.get(url)['ETag'] for url in urls}
+        title.name = 'Новое название'
+        title.save()
+        for url, etag in etags.items():
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 200, (
+                f'Проверьте, что после изменения произведения ETag `{url}` '
+                'меняется'
+            )
+        assert response.data['name'] == 'Новое название'
+
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_etag(self, client, admin, user):
+        title = Title.objects.create(name='Произведение', year=2000)
+        Review.objects.create(title=title, author=admin, text='Текст', score=5)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = client.get(url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 304, (
+            'Проверьте, что GET запрос списка отзывов с If-Modified-Since '
+            'возвращает статус 304'
+        )
+        Review.objects.create(title=title, author=user, text='Ещё', score=3)
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200, (
+            'Проверьте, что после добавления отзыва ETag списка меняется'
+        )
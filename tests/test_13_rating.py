@@ -0,0 +1,43 @@
+import pytest
+
+from reviews.models import Title
+
+from .common import auth_client
+
+
+class Test13IncrementalRating:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_rating_follows_review_writes(self, admin_client, user):
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        first = admin_client.post(url, data={'text': 'Текст', 'score': 9}).json()
+        auth_client(user).post(url, data={'text': 'Текст', 'score': 4})
+        title.refresh_from_db()
+        assert (title.score_sum, title.reviews_count, title.rating) == (13, 2, 6), (
+            'Проверьте, что при создании отзыва сумма оценок, количество '
+            'отзывов и рейтинг произведения обновляются'
+        )
+
+        admin_client.patch(f'{url}{first["id"]}/', data={'score': 10})
+        title.refresh_from_db()
+        assert (title.score_sum, title.reviews_count, title.rating) == (14, 2, 7), (
+            'Проверьте, что при изменении оценки рейтинг пересчитывается'
+        )
+
+        admin_client.delete(f'{url}{first["id"]}/')
+        title.refresh_from_db()
+        assert (title.score_sum, title.reviews_count, title.rating) == (4, 1, 4), (
+            'Проверьте, что при удалении отзыва рейтинг пересчитывается'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_rating_none_without_reviews(self, admin_client):
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        review = admin_client.post(url, data={'text': 'Текст', 'score': 5}).json()
+        admin_client.delete(f'{url}{review["id"]}/')
+        title.refresh_from_db()
+        assert title.reviews_count == 0 and title.rating is None, (
+            'Проверьте, что без отзывов рейтинг произведения равен `None`'
+        )
@@ -0,0 +1,65 @@
+from unittest import mock
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+
+from reviews.models import OutgoingEmail
+from reviews.outbox import send_pending
+
+
+class Test14EmailOutbox:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_signup_only_enqueues(self, client):
+        outbox_before_count = len(mail.outbox)
+        data = {'email': 'queued@yamdb.fake', 'username': 'queued'}
+        response = client.post('/api/v1/auth/signup/', data=data)
+        assert response.status_code == 200
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что при регистрации письмо не отправляется '
+            'во время запроса'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.recipients == data['email'] and email.sent_at is None
+
+        assert send_pending() == 1
+        assert len(mail.outbox) == outbox_before_count + 1
+        email.refresh_from_db()
+        assert email.sent_at is not None
+        assert send_pending() == 0, (
+            'Проверьте, что отправленное письмо не отправляется повторно'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_batch_uses_one_connection(self):
+        for i in range(3):
+            OutgoingEmail.objects.create(
+                subject='Тема', body='Текст', recipients=f'user{i}@yamdb.fake'
+            )
+        with mock.patch.object(
+            EmailBackend, 'open', autospec=True, return_value=True
+        ) as opened:
+            assert send_pending(batch_size=2) == 2
+        assert opened.call_count == 1, (
+            'Проверьте, что пачка писем отправляется через одно соединение'
+        )
+        assert OutgoingEmail.objects.filter(sent_at__isnull=True).count() == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_failed_email_retried_later(self):
+        OutgoingEmail.objects.create(
+            subject='Тема', body='Текст', recipients='user@yamdb.fake'
+        )
+        with mock.patch.object(
+            EmailBackend, 'send_messages', side_effect=OSError('SMTP')
+        ):
+            assert send_pending() == 0
+        email = OutgoingEmail.objects.get()
+        assert email.attempts == 1 and email.last_error == 'SMTP'
+        assert email.send_after > email.created, (
+            'Проверьте, что неудачное письмо откладывается'
+        )
+        assert send_pending() == 0, (
+            'Проверьте, что отложенное письмо не отправляется раньше срока'
+        )
@@ -0,0 +1,99 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from django.core.cache.backends.db import DatabaseCache
+
+from api.checks import shared_cache_check
+from api.tokens import get_jwt_token
+from reviews import versions
+from reviews.models import Title
+
+
+def token_client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {get_jwt_token(user)["token"]}'
+    )
+    return client
+
+
+class Test15StatelessJWT:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_no_user_queries(self, admin, user):
+        title = Title.objects.create(name='Произведение', year=2000)
+        client = token_client(user)
+        client.get('/api/v1/titles/')  # версия токенов попадает в кэш
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(
+                f'/api/v1/titles/{title.id}/reviews/',
+                data={'text': 'Текст', 'score': 7},
+            )
+        assert response.status_code == 201
+        assert response.json()['author'] == user.username
+        assert not [
+            query for query in context.captured_queries
+            if 'FROM "reviews_customuser"' in query['sql']
+        ], (
+            'Проверьте, что при запросе с токеном пользователь '
+            'не загружается из базы'
+        )
+
+        response = token_client(admin).post(
+            '/api/v1/categories/', data={'name': 'Фильм', 'slug': 'films'}
+        )
+        assert response.status_code == 201, (
+            'Проверьте, что права администратора берутся из токена'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_role_change_revokes_token(self, admin):
+        client = token_client(admin)
+        assert client.get('/api/v1/users/').status_code == 200
+        admin.role = 'user'
+        admin.save()
+        response = client.get('/api/v1/users/')
+        assert response.status_code == 401, (
+            'Проверьте, что после смены роли выданный ранее токен отзывается'
+        )
+        assert token_client(admin).get('/api/v1/users/').status_code == 403
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_deleted_user_rejected(self, user):
+        client = token_client(user)
+        user.delete()
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == 401, (
+            'Проверьте, что токен удалённого пользователя не принимается'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_revocation_seen_by_other_workers(self, admin, monkeypatch):
+        # Два процесса сервера: у каждого свой объект кэша над общей
+        # таблицей.
+        first, second = (DatabaseCache('yamdb_cache', {}) for _ in range(2))
+        monkeypatch.setattr(versions, 'cache', first)
+        client = token_client(admin)
+        assert client.get('/api/v1/users/').status_code == 200
+
+        monkeypatch.setattr(versions, 'cache', second)
+        admin.role = 'user'
+        admin.save()
+
+        monkeypatch.setattr(versions, 'cache', first)
+        assert client.get('/api/v1/users/').status_code == 401, (
+            'Проверьте, что отзыв токена в одном процессе виден в других'
+        )
+
+    def test_05_process_local_cache_rejected(self, settings):
+        settings.DEBUG = False
+        assert [error.id for error in shared_cache_check(None)] == [
+            'api.E001'
+        ], 'Проверьте, что кэш в памяти процесса не проходит проверку'
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'yamdb_cache',
+        }}
+        assert shared_cache_check(None) == []
@@ -0,0 +1,60 @@
+import pytest
+from django.urls import get_resolver, resolve
+
+from api.benchmark import (
+    build_endpoints, compare, percentile, run_benchmark, seed_dataset,
+)
+
+
+class Test16Benchmark:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_all_endpoints_measured(self):
+        dataset = seed_dataset(titles=5, reviews_per_title=3)
+        assert dataset['reviews'] == 15
+        results = run_benchmark(iterations=2, warmup=0)
+        assert 'titles-list' in results and 'auth-signup' in results
+        for name, result in results.items():
+            assert all(status < 400 for status in result['statuses']), (
+                f'Проверьте, что запрос бенчмарка `{name}` выполняется успешно'
+            )
+            assert result['p50_ms'] <= result['p95_ms'] <= result['p99_ms']
+
+    def test_02_percentile_and_compare(self):
+        assert percentile(list(range(1, 101)), 95) == 95
+        assert percentile([5], 99) == 5
+        baseline = {'x': {'p50_ms': 10, 'p95_ms': 20, 'queries_max': 2}}
+        current = {'x': {'p50_ms': 10.5, 'p95_ms': 30, 'queries_max': 2}}
+        assert [item[1] for item in compare(current, baseline)] == ['p95_ms']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_every_route_and_method(self):
+        seed_dataset(titles=5, reviews_per_title=3)
+        covered = set()
+        for _, _, method, request in build_endpoints():
+            url, _ = request(0)
+            match = resolve(url.partition('?')[0])
+            covered.add((match.url_name or match.route, method))
+        expected = set()
+        patterns = [('', pattern) for pattern in get_resolver().url_patterns]
+        while patterns:
+            prefix, pattern = patterns.pop()
+            route = prefix + str(pattern.pattern)
+            if hasattr(pattern, 'url_patterns'):
+                patterns += [(route, child) for child in pattern.url_patterns]
+                continue
+            if not route.startswith('api/') or pattern.name == 'api-root':
+                continue
+            if '(?P<format>' in route:
+                continue
+            callback = pattern.callback
+            methods = getattr(callback, 'actions', None) or {
+                method.lower() for method in callback.cls().allowed_methods
+            }
+            expected |= {
+                (pattern.name or route, method) for method in methods
+                if method not in ('put', 'head', 'options')
+            }
+        assert expected - covered == set(), (
+            'Проверьте, что бенчмарк замеряет все маршруты и методы API'
+        )
@@ -0,0 +1,75 @@
+import csv
+from collections import Counter
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Comment, Review, Title
+
+
+def read(path):
+    with open(path, encoding='utf-8', newline='') as file:
+        return list(csv.DictReader(file))
+
+
+class Test17GenerateDataset:
+    options = {
+        'titles': 50, 'reviews': 400, 'comments': 600, 'shard_size': 7,
+    }
+
+    def test_01_reproducible_csv(self, tmp_path):
+        call_command(
+            'generate_dataset', output=str(tmp_path / 'a'), workers=1,
+            **self.options
+        )
+        call_command(
+            'generate_dataset', output=str(tmp_path / 'b'), workers=3,
+            **self.options
+        )
+        for name in ('titles.csv', 'review.csv', 'comments.csv'):
+            assert (tmp_path / 'a' / name).read_bytes() == (
+                tmp_path / 'b' / name
+            ).read_bytes(), (
+                'Проверьте, что при одном seed данные не зависят '
+                'от числа процессов'
+            )
+
+        reviews = read(tmp_path / 'a' / 'review.csv')
+        comments = read(tmp_path / 'a' / 'comments.csv')
+        assert len(comments) == self.options['comments'], (
+            'Проверьте, что комментариев создаётся ровно `--comments`'
+        )
+        assert {row['review_id'] for row in comments} <= {
+            row['id'] for row in reviews
+        }
+        assert [int(row['id']) for row in reviews] == list(
+            range(1, len(reviews) + 1)
+        )
+        pairs = Counter((row['title_id'], row['author']) for row in reviews)
+        assert max(pairs.values()) == 1, (
+            'Проверьте, что автор пишет не больше одного отзыва '
+            'на произведение'
+        )
+        per_title = sorted(
+            Counter(row['title_id'] for row in reviews).values()
+        )
+        assert per_title[-1] > 5 * per_title[len(per_title) // 2], (
+            'Проверьте, что популярность произведений неравномерна'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_load_into_db(self, tmp_path):
+        out = StringIO()
+        call_command(
+            'generate_dataset', format='db', workers=2, stdout=out,
+            **self.options
+        )
+        assert 'будут удалены' in out.getvalue(), (
+            'Проверьте, что `--format db` предупреждает об очистке каталога'
+        )
+        assert Title.objects.count() == 50
+        assert Review.objects.count() > 300
+        assert Comment.objects.count() > 400
+        title = Title.objects.order_by('-reviews_count').first()
+        assert title.reviews_count == title.reviews.count()
@@ -0,0 +1,94 @@
+import logging
+import os
+
+import pytest
+
+from api.sql import QueryLog, view_stats
+from reviews.models import CustomUser, Title
+
+
+class Test18SQLInstrumentation:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_headers(self, client, settings):
+        settings.SQL_INSTRUMENTATION = True
+        Title.objects.create(name='Произведение', year=2000)
+        settings.SQL_DEBUG_HEADERS = True
+        response = client.get('/api/v1/titles/')
+        assert response['X-SQL-Queries'] == '3', (
+            'Проверьте, что в заголовке X-SQL-Queries передаётся '
+            'число запросов к базе'
+        )
+        assert float(response['X-SQL-Time-Ms']) >= 0
+        assert response['X-SQL-Duplicates'] == '0'
+
+        settings.SQL_DEBUG_HEADERS = False
+        response = client.get('/api/v1/titles/')
+        assert 'X-SQL-Queries' not in response, (
+            'Проверьте, что без режима отладки заголовки X-SQL-* не выводятся'
+        )
+
+    def test_02_duplicates_and_similar(self):
+        log = QueryLog()
+        sql = 'SELECT * FROM "reviews_customuser" WHERE "id" = %s'
+        for params in ((1,), (1,), (2,)):
+            log(lambda *args: None, sql, params, False, {})
+        log(lambda *args: None, 'SELECT 1 WHERE "id" IN (%s, %s)', (1, 2),
+            False, {})
+        log(lambda *args: None, 'SELECT 1 WHERE "id" IN (%s)', (3,),
+            False, {})
+        assert log.duplicates == 1
+        assert log.similar == 3, (
+            'Проверьте, что однотипные запросы с разными параметрами '
+            'считаются похожими'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_slow_request_log(self, client, settings, caplog):
+        settings.SQL_INSTRUMENTATION = True
+        settings.SLOW_REQUEST_MS = 0
+        with caplog.at_level(logging.WARNING, logger='api.sql'):
+            client.get('/api/v1/titles/')
+            client.post('/api/v1/auth/signup/', data={
+                'username': 'secret_user', 'email': 'secret@yamdb.fake',
+            })
+        assert CustomUser.objects.filter(username='secret_user').exists()
+        assert 'titles-list' in caplog.text
+        assert 'FROM "reviews_title"' in caplog.text, (
+            'Проверьте, что в журнал медленных запросов пишется полный SQL'
+        )
+        assert 'secret@yamdb.fake' not in caplog.text, (
+            'Проверьте, что параметры запросов не попадают в журнал'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_stats_endpoint(self, client, user_client, admin_client,
+                               settings):
+        settings.SQL_INSTRUMENTATION = True
+        view_stats.clear()
+        for _ in range(2):
+            client.get('/api/v1/titles/')
+        assert client.get('/api/v1/sql-stats/').status_code == 401
+        assert user_client.get('/api/v1/sql-stats/').status_code == 403
+        response = admin_client.get('/api/v1/sql-stats/')
+        assert response.status_code == 200
+        data = response.json()
+        assert data['pid'] == os.getpid(), (
+            'Проверьте, что `/api/v1/sql-stats/` указывает процесс, '
+            'к которому относится статистика'
+        )
+        stats = data['views']['titles-list']
+        assert stats['requests'] == 2 and stats['max_queries'] >= 1
+        assert admin_client.delete('/api/v1/sql-stats/').status_code == 204
+        assert 'titles-list' not in view_stats.summary()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_disabled_by_default(self, client, settings):
+        settings.SQL_INSTRUMENTATION = False
+        settings.SQL_DEBUG_HEADERS = True
+        view_stats.clear()
+        response = client.get('/api/v1/titles/')
+        assert 'X-SQL-Queries' not in response
+        assert view_stats.summary() == {}, (
+            'Проверьте, что без SQL_INSTRUMENTATION запросы не считаются'
+        )
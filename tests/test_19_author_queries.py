@@ -0,0 +1,60 @@
+import pytest
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, Review, Title
+
+
+def create_discussion(size):
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(username=f'author{i}', email=f'author{i}@yamdb.fake')
+        for i in range(size)
+    )
+    authors = list(User.objects.order_by('id'))
+    title = Title.objects.create(name='Произведение', year=2000)
+    Review.objects.bulk_create(
+        Review(title=title, author=author, text='Текст', score=5)
+        for author in authors
+    )
+    review = Review.objects.order_by('id').first()
+    Comment.objects.bulk_create(
+        Comment(review=review, author=author, text='Текст')
+        for author in authors
+    )
+    return title, review
+
+
+def count_queries(client, url):
+    # Количество кэшируется, замеряется запрос с холодным кэшем.
+    cache.clear()
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    results = response.json()['results']
+    assert all(item['author'].startswith('author') for item in results), (
+        f'Проверьте, что при GET запросе `{url}` '
+        'в поле `author` возвращается username'
+    )
+    return len(results), len(context.captured_queries)
+
+
+class Test19AuthorQueries:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_constant_queries(self, client):
+        title, review = create_discussion(1000)
+        reviews_url = f'/api/v1/titles/{title.id}/reviews/'
+        comments_url = f'{reviews_url}{review.id}/comments/'
+        for url in (reviews_url, comments_url):
+            counts = set()
+            for limit in (10, 100, 1000):
+                size, queries = count_queries(client, f'{url}?limit={limit}')
+                assert size == limit
+                counts.add(queries)
+            assert len(counts) == 1 and counts.pop() <= 3, (
+                f'Проверьте, что количество запросов при GET запросе `{url}` '
+                'не зависит от размера страницы'
+            )
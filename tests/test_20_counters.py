@@ -0,0 +1,140 @@
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Comment, Review, Title
+
+from .common import auth_client
+
+
+class Test20Counters:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_counters_follow_writes(self, admin_client, user):
+        title = Title.objects.create(name='Произведение', year=2000)
+        reviews_url = f'/api/v1/titles/{title.id}/reviews/'
+        review = admin_client.post(
+            reviews_url, data={'text': 'Текст', 'score': 8}
+        ).json()
+        user_review = auth_client(user).post(
+            reviews_url, data={'text': 'Текст', 'score': 4}
+        ).json()
+        comments_url = f'{reviews_url}{review["id"]}/comments/'
+        comment = admin_client.post(comments_url, data={'text': 'Раз'}).json()
+        auth_client(user).post(comments_url, data={'text': 'Два'})
+
+        data = admin_client.get(f'/api/v1/titles/{title.id}/').json()
+        assert data['reviews_count'] == 2, (
+            'Проверьте, что в ответе на GET запрос `/api/v1/titles/{title_id}/` '
+            'есть актуальное поле `reviews_count`'
+        )
+        data = admin_client.get(f'{reviews_url}{review["id"]}/').json()
+        assert data['comments_count'] == 2, (
+            'Проверьте, что в ответе на GET запрос '
+            '`/api/v1/titles/{title_id}/reviews/{review_id}/` '
+            'есть актуальное поле `comments_count`'
+        )
+
+        admin_client.delete(f'{comments_url}{comment["id"]}/')
+        assert Review.objects.get(id=review['id']).comments_count == 1
+
+        user.delete()
+        title.refresh_from_db()
+        assert (title.reviews_count, title.score_sum) == (1, 8), (
+            'Проверьте, что счётчики учитывают каскадное удаление отзывов'
+        )
+        assert Review.objects.get(id=review['id']).comments_count == 0
+        assert not Review.objects.filter(id=user_review['id']).exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reconcile_command(self, admin, user):
+        titles = [
+            Title.objects.create(name=f'Произведение {i}', year=2000)
+            for i in range(5)
+        ]
+        review = Review.objects.create(
+            title=titles[0], author=admin, text='Текст', score=6
+        )
+        Review.objects.create(
+            title=titles[3], author=user, text='Текст', score=2
+        )
+        Comment.objects.create(review=review, author=user, text='Текст')
+        Title.objects.filter(id=titles[1].id).update(reviews_count=7)
+
+        call_command('reconcile_counters', chunk_size=2, workers=2)
+        for title, expected in zip(titles, ((6, 1), (0, 0), (0, 0), (2, 1))):
+            title.refresh_from_db()
+            assert (title.score_sum, title.reviews_count) == expected, (
+                'Проверьте, что команда reconcile_counters исправляет '
+                'счётчики произведений'
+            )
+        assert titles[0].rating == 6
+        review.refresh_from_db()
+        assert review.comments_count == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_counters_follow_orm_writes(self, admin):
+        first, second = (
+            Title.objects.create(name=f'Произведение {i}', year=2000)
+            for i in range(2)
+        )
+        review = Review.objects.create(
+            title=first, author=admin, text='Текст', score=8
+        )
+        comment = Comment.objects.create(
+            review=review, author=admin, text='Текст'
+        )
+        first.refresh_from_db()
+        review.refresh_from_db()
+        assert (first.score_sum, first.reviews_count, first.score_8) == (
+            8, 1, 1
+        ), 'Проверьте, что отзыв, созданный в обход API, учитывается'
+        assert review.comments_count == 1
+
+        review.score = 3
+        review.save()
+        first.refresh_from_db()
+        assert (first.score_sum, first.score_8, first.score_3) == (3, 0, 1)
+        review.title = second
+        review.save()
+        first.refresh_from_db()
+        second.refresh_from_db()
+        assert (first.score_sum, first.reviews_count) == (0, 0)
+        assert (second.score_sum, second.reviews_count) == (3, 1)
+
+        comment.delete()
+        review.delete()
+        second.refresh_from_db()
+        assert (second.score_sum, second.reviews_count, second.score_3) \
+            == (0, 0, 0), (
+                'Проверьте, что счётчики меняются симметрично'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_title_update_keeps_counters(self, admin_client, user):
+        title = Title.objects.create(name='Произведение', year=2000)
+
+        def review_meanwhile(serializer, attrs):
+            # Отзыв пишется параллельно, после чтения произведения.
+            Review.objects.create(
+                title=title, author=user, text='Текст', score=7
+            )
+            return attrs
+
+        with mock.patch(
+            'api.serializers.TitleCreateSerializer.validate',
+            review_meanwhile,
+        ):
+            response = admin_client.patch(
+                f'/api/v1/titles/{title.id}/', data={'name': 'Новое'}
+            )
+        assert response.status_code == 200
+        title.refresh_from_db()
+        assert title.name == 'Новое'
+        assert (title.score_sum, title.reviews_count, title.rating) == (
+            7, 1, 7
+        ), (
+            'Проверьте, что изменение произведения не затирает его '
+            'счётчики'
+        )
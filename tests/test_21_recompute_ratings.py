@@ -0,0 +1,60 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Category, Review, Title
+
+
+class Test21RecomputeRatings:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_recompute_drifted(self, admin, user):
+        category = Category.objects.create(name='Фильм', slug='films')
+        titles = [
+            Title.objects.create(
+                name=f'Произведение {i}', year=2000,
+                category=category if i % 2 else None,
+            )
+            for i in range(6)
+        ]
+        for title in titles[:4]:
+            Review.objects.create(
+                title=title, author=admin, text='Текст', score=8
+            )
+            Review.objects.create(
+                title=title, author=user, text='Текст', score=3
+            )
+        # Счётчики расходятся с отзывами, как после загрузки в обход
+        # сигналов.
+        Title.objects.filter(id__in=[t.id for t in titles[:4]]).update(
+            score_sum=0, reviews_count=0, rating=None, score_3=0, score_8=0
+        )
+        Title.objects.filter(id=titles[4].id).update(rating=9)
+
+        out = StringIO()
+        call_command(
+            'recompute_ratings', category='films', chunk_size=2, stdout=out
+        )
+        for title, rating in zip(titles, (None, 5, None, 5)):
+            title.refresh_from_db()
+            assert title.rating == rating, (
+                'Проверьте, что команда recompute_ratings пересчитывает '
+                'только отобранные произведения'
+            )
+        assert f'id={titles[1].id}: None -> 5' in out.getvalue(), (
+            'Проверьте, что команда выводит исправленные произведения'
+        )
+
+        out = StringIO()
+        call_command('recompute_ratings', chunk_size=4, stdout=out)
+        titles[0].refresh_from_db()
+        titles[4].refresh_from_db()
+        assert (titles[0].rating, titles[0].reviews_count) == (5, 2)
+        assert (titles[0].score_3, titles[0].score_8) == (1, 1)
+        assert titles[4].rating is None
+        assert 'исправлено произведений: 3' in out.getvalue()
+
+        out = StringIO()
+        call_command('recompute_ratings', stdout=out)
+        assert 'исправлено произведений: 0' in out.getvalue()
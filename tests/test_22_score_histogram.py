@@ -0,0 +1,51 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Title
+
+from .common import auth_client
+
+
+class Test22ScoreHistogram:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_histogram_follows_reviews(self, client, admin_client, user):
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        first = admin_client.post(url, data={'text': 'Текст', 'score': 9}).json()
+        auth_client(user).post(url, data={'text': 'Текст', 'score': 4})
+        admin_client.patch(f'{url}{first["id"]}/', data={'score': 10})
+
+        summary_url = f'/api/v1/titles/{title.id}/summary/'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(summary_url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET запрос `{summary_url}` доступен без токена'
+        )
+        assert not [
+            query for query in context.captured_queries
+            if 'reviews_review' in query['sql']
+        ], 'Проверьте, что сводка оценок не читает таблицу отзывов'
+        data = response.json()
+        assert data['histogram'] == {
+            str(score): int(score in (4, 10)) for score in range(1, 11)
+        }, (
+            'Проверьте, что распределение оценок обновляется при создании '
+            'и изменении отзыва'
+        )
+        assert (data['rating'], data['average'], data['reviews_count']) == (
+            7, 7.0, 2
+        )
+
+        admin_client.delete(f'{url}{first["id"]}/')
+        data = client.get(summary_url).json()
+        assert data['histogram']['10'] == 0 and data['histogram']['4'] == 1, (
+            'Проверьте, что распределение оценок обновляется при удалении '
+            'отзыва'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_summary_not_found(self, client):
+        response = client.get('/api/v1/titles/999/summary/')
+        assert response.status_code == 404
@@ -0,0 +1,84 @@
+from unittest import mock
+
+import numpy as np
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from reviews.models import Review, Title
+from reviews.ranking import bayesian_ratings, load_histograms
+
+
+class Test23BayesianRanking:
+
+    def test_01_prior_pulls_small_samples(self):
+        histograms = np.zeros((3, 10))
+        histograms[0, 9] = 1  # одна десятка
+        histograms[1, 8] = 5000  # пять тысяч девяток
+        mean, lower, upper = bayesian_ratings(
+            histograms, prior_weight=10, prior_mean=6
+        )
+        assert mean[1] > mean[0], (
+            'Проверьте, что одна оценка 10 не обгоняет тысячи оценок 9'
+        )
+        assert lower[0] < mean[0] < upper[0]
+        assert upper[1] - lower[1] < upper[0] - lower[0], (
+            'Проверьте, что доверительный интервал сужается '
+            'с ростом числа отзывов'
+        )
+        assert np.isnan(mean[2]), (
+            'Проверьте, что у произведения без отзывов нет рейтинга'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_rank_titles_command(self, client):
+        User = get_user_model()
+        User.objects.bulk_create(
+            User(username=f'user{i}', email=f'user{i}@yamdb.fake')
+            for i in range(30)
+        )
+        users = list(User.objects.all())
+        lucky, popular, empty = (
+            Title.objects.create(name=name, year=2000)
+            for name in ('Одна десятка', 'Много девяток', 'Без отзывов')
+        )
+        Review.objects.create(
+            title=lucky, author=users[0], text='Текст', score=10
+        )
+        Review.objects.bulk_create(
+            Review(title=popular, author=user, text='Текст', score=9)
+            for user in users
+        )
+        call_command('rank_titles', prior_weight=5, prior_mean=5)
+        for title in (lucky, popular, empty):
+            title.refresh_from_db()
+        assert popular.weighted_rating > lucky.weighted_rating
+        assert popular.rating_lower <= popular.weighted_rating
+        assert empty.weighted_rating is None
+        response = client.get(f'/api/v1/titles/{popular.id}/')
+        assert response.json()['weighted_rating'] == popular.weighted_rating, (
+            'Проверьте, что взвешенный рейтинг выводится в ответе '
+            '`/api/v1/titles/{title_id}/`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_titles_created_while_loading(self, admin):
+        first = Title.objects.create(name='Первое', year=2000)
+        Review.objects.create(title=first, author=admin, text='Т', score=7)
+        fromiter = np.fromiter
+
+        def title_meanwhile(*args, **kwargs):
+            ids = fromiter(*args, **kwargs)
+            # Произведение с отзывом появляется между двумя чтениями.
+            title = Title.objects.create(name='Новое', year=2000)
+            Review.objects.create(title=title, author=admin, text='Т',
+                                  score=3)
+            return ids
+
+        with mock.patch('reviews.ranking.np.fromiter', title_meanwhile):
+            ids, histograms = load_histograms()
+        assert ids.tolist() == [first.id], (
+            'Проверьте, что отзывы произведений, созданных во время '
+            'загрузки, пропускаются'
+        )
+        assert histograms[0].tolist() == [0] * 6 + [1] + [0] * 3
@@ -0,0 +1,72 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Title
+
+from .test_08_queries import create_catalog
+
+
+def query_plan(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    sql = next(
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith('SELECT') and 'ORDER BY' in query['sql']
+        and 'FROM "reviews_title"' in query['sql']
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+    return response.json(), plan
+
+
+class Test24TitleOrdering:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_ordering(self, client):
+        create_catalog(40)
+        for i, title in enumerate(Title.objects.order_by('id')):
+            Title.objects.filter(id=title.id).update(
+                rating=i % 7, reviews_count=i % 5
+            )
+        cases = {
+            '-rating': lambda t: (-t.rating, -t.id),
+            'rating': lambda t: (t.rating, t.id),
+            '-reviews_count': lambda t: (-t.reviews_count, -t.id),
+            'name': lambda t: (t.name, t.id),
+            '-year': lambda t: (-t.year, -t.id),
+        }
+        titles = list(Title.objects.all())
+        for ordering, key in cases.items():
+            data = client.get(
+                f'/api/v1/titles/?ordering={ordering}&limit=40'
+            ).json()
+            assert [title['id'] for title in data['results']] == [
+                title.id for title in sorted(titles, key=key)
+            ], (
+                f'Проверьте, что `/api/v1/titles/?ordering={ordering}` '
+                'сортирует произведения, а при равенстве - по id'
+            )
+
+        data = client.get('/api/v1/titles/?year=1995&ordering=-rating').json()
+        assert data['results'] and all(
+            title['year'] == 1995 for title in data['results']
+        ), 'Проверьте, что сортировка работает вместе с фильтрами'
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('query', [
+        'ordering=-rating',
+        'ordering=rating&year=1995',
+        'ordering=name',
+        'ordering=-reviews_count',
+        'ordering=-weighted_rating',
+    ])
+    def test_02_ordering_uses_index(self, client, query):
+        create_catalog(40)
+        _, plan = query_plan(client, f'/api/v1/titles/?{query}')
+        assert 'TEMP B-TREE' not in plan, (
+            f'Проверьте, что для `/api/v1/titles/?{query}` есть индекс '
+            f'и сортировка не выполняется во временной таблице: {plan}'
+        )
@@ -0,0 +1,196 @@
+import random
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews import leaderboards
+from reviews.models import Category, Genre, LeaderboardEntry, Title
+
+from .common import auth_client
+
+
+def top_ids(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что GET запрос `{url}` возвращает статус 200'
+    )
+    return [title['id'] for title in response.json()]
+
+
+class Test25Leaderboards:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_top_follows_reviews(self, client, admin_client, user,
+                                    settings):
+        settings.LEADERBOARD_SIZE = 2
+        films = Category.objects.create(name='Фильм', slug='films')
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        titles = [
+            Title.objects.create(
+                name=f'Произведение {i}', year=2000,
+                category=films if i < 2 else None,
+            )
+            for i in range(4)
+        ]
+        titles[1].genre.add(drama)
+        titles[3].genre.add(drama)
+        reviews = {}
+        for title, score in zip(titles, (6, 8, 3, 9)):
+            reviews[title.id] = admin_client.post(
+                f'/api/v1/titles/{title.id}/reviews/',
+                data={'text': 'Текст', 'score': score},
+            ).json()['id']
+
+        assert top_ids(client, '/api/v1/titles/top/') == [
+            titles[3].id, titles[1].id
+        ], 'Проверьте, что `/api/v1/titles/top/` возвращает лучшие произведения'
+        assert top_ids(client, '/api/v1/titles/top/category/films/') == [
+            titles[1].id, titles[0].id
+        ]
+        assert top_ids(client, '/api/v1/titles/top/genre/drama/') == [
+            titles[3].id, titles[1].id
+        ]
+        assert top_ids(client, '/api/v1/titles/top/?limit=1') == [titles[3].id]
+
+        auth_client(user).post(
+            f'/api/v1/titles/{titles[2].id}/reviews/',
+            data={'text': 'Текст', 'score': 10},
+        )
+        admin_client.delete(
+            f'/api/v1/titles/{titles[3].id}/reviews/{reviews[titles[3].id]}/'
+        )
+        assert top_ids(client, '/api/v1/titles/top/') == [
+            titles[1].id, titles[0].id
+        ], (
+            'Проверьте, что рейтинг лучших обновляется при создании '
+            'и удалении отзывов'
+        )
+        assert top_ids(client, '/api/v1/titles/top/genre/drama/') == [
+            titles[1].id
+        ]
+        response = client.get('/api/v1/titles/top/category/unknown/')
+        assert response.status_code == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_bounded_board_matches_sql(self, settings):
+        settings.LEADERBOARD_SIZE = 3
+        rng = random.Random(0)
+        titles = [
+            Title.objects.create(name=f'Произведение {i}', year=2000)
+            for i in range(15)
+        ]
+        for _ in range(300):
+            title = rng.choice(titles)
+            rating = rng.choice([None, *range(1, 11)])
+            Title.objects.filter(id=title.id).update(rating=rating)
+            leaderboards.update_title(title.id)
+            expected = list(
+                Title.objects.filter(rating__isnull=False)
+                .order_by('-rating', 'id')
+                .values_list('id', flat=True)[:3]
+            )
+            actual = list(
+                leaderboards.top_titles(leaderboards.ALL)
+                .values_list('id', flat=True)[:3]
+            )
+            assert actual == expected, (
+                'Проверьте, что ограниченный рейтинг совпадает с сортировкой '
+                'каталога'
+            )
+            assert LeaderboardEntry.objects.count() <= 6
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_rebuild_command(self, settings):
+        settings.LEADERBOARD_SIZE = 2
+        titles = [
+            Title.objects.create(name=f'Произведение {i}', year=2000)
+            for i in range(3)
+        ]
+        for rating, title in enumerate(titles, 1):
+            Title.objects.filter(id=title.id).update(rating=rating)
+        call_command('rebuild_leaderboards')
+        assert list(
+            leaderboards.top_titles(leaderboards.ALL)
+            .values_list('id', flat=True)
+        ) == [title.id for title in reversed(titles)]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_refilled_after_removals(self, settings):
+        settings.LEADERBOARD_SIZE = 2
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        titles = [
+            Title.objects.create(name=f'Произведение {i}', year=2000)
+            for i in range(8)
+        ]
+        for rating, title in enumerate(titles, 1):
+            Title.objects.filter(id=title.id).update(rating=rating)
+            title.genre.add(drama)
+        leaderboards.rebuild_all()
+        board = leaderboards.genre_board(drama.id)
+
+        for title in titles[-3:]:
+            title.delete()
+        expected = [titles[4].id, titles[3].id]
+        for name in (leaderboards.ALL, board):
+            assert list(
+                leaderboards.top_titles(name).values_list('id', flat=True)
+            )[:2] == expected, (
+                'Проверьте, что рейтинг дополняется после удаления '
+                'произведений'
+            )
+
+        titles[4].genre.remove(drama)
+        titles[3].genre.remove(drama)
+        assert list(
+            leaderboards.top_titles(board).values_list('id', flat=True)
+        )[:2] == [titles[2].id, titles[1].id], (
+            'Проверьте, что рейтинг жанра дополняется после удаления '
+            'жанра у произведения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_short_board_updates_one_title(self, settings):
+        films = Category.objects.create(name='Фильм', slug='films')
+        genres = [
+            Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+            for i in range(3)
+        ]
+        titles = [
+            Title.objects.create(
+                name=f'Произведение {i}', year=2000, category=films
+            )
+            for i in range(5)
+        ]
+        for rating, title in enumerate(titles, 1):
+            Title.objects.filter(id=title.id).update(rating=rating)
+            title.genre.set(genres)
+        leaderboards.rebuild_all()
+        boards = [
+            leaderboards.ALL,
+            leaderboards.category_board(films.id),
+            *map(leaderboards.genre_board, [genre.id for genre in genres]),
+        ]
+        for title, rating in ((titles[0], 9), (titles[1], None)):
+            Title.objects.filter(id=title.id).update(rating=rating)
+            with CaptureQueriesContext(connection) as context:
+                leaderboards.update_title(title.id)
+            writes = [
+                query['sql'] for query in context.captured_queries
+                if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+            ]
+            assert len(writes) <= len(boards), (
+                'Проверьте, что неполный рейтинг не пересобирается целиком '
+                'при изменении одного произведения'
+            )
+            expected = list(
+                Title.objects.filter(rating__isnull=False)
+                .order_by('-rating', 'id')
+                .values_list('id', flat=True)
+            )
+            for board in boards:
+                assert list(
+                    leaderboards.top_titles(board)
+                    .values_list('id', flat=True)
+                ) == expected
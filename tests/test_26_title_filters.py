@@ -0,0 +1,80 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Genre, Title
+
+
+def create_titles():
+    films = Category.objects.create(name='Фильм', slug='films')
+    books = Category.objects.create(name='Книга', slug='books')
+    Category.objects.create(name='Музыка', slug='music')
+    drama, comedy, horror = (
+        Genre.objects.create(name=name, slug=slug)
+        for name, slug in (
+            ('Драма', 'drama'), ('Комедия', 'comedy'), ('Ужасы', 'horror'),
+        )
+    )
+    spec = (
+        ('Обе', 1990, films, (drama, comedy)),
+        ('Драма', 2000, books, (drama,)),
+        ('Комедия', 2010, films, (comedy,)),
+        ('Ужасы', 2020, None, (horror,)),
+    )
+    titles = {}
+    for name, year, category, genres in spec:
+        title = Title.objects.create(name=name, year=year, category=category)
+        title.genre.set(genres)
+        titles[name] = title.id
+    return titles
+
+
+def names(client, query):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(f'/api/v1/titles/?{query}&limit=50')
+    assert response.status_code == 200
+    for captured in context.captured_queries:
+        assert 'DISTINCT' not in captured['sql'], (
+            f'Проверьте, что фильтр `{query}` не требует DISTINCT'
+        )
+    return sorted(title['name'] for title in response.json()['results'])
+
+
+class Test26TitleFilters:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_genre_lists(self, client):
+        create_titles()
+        assert names(client, 'genre=drama,comedy') == [
+            'Драма', 'Комедия', 'Обе'
+        ], (
+            'Проверьте, что `?genre=a,b` возвращает произведения с любым '
+            'из жанров без повторов'
+        )
+        assert names(client, 'genre=drama,comedy&genre_mode=all') == ['Обе'], (
+            'Проверьте, что `?genre_mode=all` оставляет произведения '
+            'со всеми жанрами'
+        )
+        assert names(client, 'genre=dram') == [], (
+            'Проверьте, что slug жанра сравнивается точно'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_category_and_year(self, client):
+        create_titles()
+        assert names(client, 'category=films,music') == ['Комедия', 'Обе']
+        assert names(client, 'year__gte=2000&year__lte=2010') == [
+            'Драма', 'Комедия'
+        ], 'Проверьте, что работают фильтры `year__gte` и `year__lte`'
+        assert names(
+            client, 'category=films,books&genre=drama&year__lte=1995'
+        ) == ['Обе']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_empty_lists_ignored(self, client):
+        create_titles()
+        for query in ('genre=,', 'category=,%20', 'genre=,&genre_mode=all'):
+            assert len(names(client, query)) == 4, (
+                f'Проверьте, что пустой список в `?{query}` не фильтрует '
+                'произведения'
+            )
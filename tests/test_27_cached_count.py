@@ -0,0 +1,93 @@
+import time
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review, Title
+
+
+def get(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    counts = [
+        query for query in context.captured_queries
+        if 'COUNT(' in query['sql']
+    ]
+    return response.json(), counts
+
+
+class Test27CachedCount:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_count_cached_until_write(self, client, admin, user):
+        title = Title.objects.create(name='Произведение', year=2000)
+        Review.objects.create(title=title, author=admin, text='Текст', score=5)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        data, counts = get(client, f'{url}?limit=1')
+        assert data['count'] == 1 and counts
+        data, counts = get(client, f'{url}?limit=5&offset=0')
+        assert data['count'] == 1 and not counts, (
+            'Проверьте, что количество отзывов берётся из кэша, '
+            'если другие параметры фильтра не менялись'
+        )
+        Review.objects.create(title=title, author=user, text='Текст', score=5)
+        data, counts = get(client, f'{url}?limit=5')
+        assert data['count'] == 2, (
+            'Проверьте, что кэш количества сбрасывается при записи'
+        )
+
+        Title.objects.create(name='Другое', year=2010)
+        data, _ = get(client, '/api/v1/titles/?year=2010')
+        assert data['count'] == 1
+        data, counts = get(client, '/api/v1/titles/?year=2010&limit=3')
+        assert data['count'] == 1 and not counts
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_count_opt_out(self, client):
+        for i in range(3):
+            Title.objects.create(name=f'Произведение {i}', year=2000)
+        data, counts = get(client, '/api/v1/titles/?count=false&limit=2')
+        assert 'count' not in data and not counts, (
+            'Проверьте, что с `?count=false` количество не считается'
+        )
+        assert len(data['results']) == 2 and data['next']
+        data, _ = get(client, data['next'])
+        assert len(data['results']) == 1 and data['next'] is None
+        assert data['previous']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_estimate_above_threshold(self, admin_client, settings):
+        settings.COUNT_ESTIMATE_THRESHOLD = 1
+        data, _ = get(admin_client, '/api/v1/users/')
+        assert data['count'] == 1 and 'count_estimated' not in data
+
+        for i in range(3):
+            Title.objects.create(name=f'Произведение {i}', year=2000)
+        with mock.patch(
+            'api.pagination.estimate_count', return_value=1000
+        ):
+            data, _ = get(admin_client, '/api/v1/titles/')
+        assert data['count'] == 1000 and data['count_estimated'], (
+            'Проверьте, что выше порога используется оценка количества'
+        )
+        data, _ = get(admin_client, '/api/v1/titles/?year=1999')
+        assert data['count'] == 0 and 'count_estimated' not in data
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_count_expires(self, client, settings):
+        settings.COUNT_CACHE_TIMEOUT = 60
+        Title.objects.create(name='Произведение', year=2000)
+        data, counts = get(client, '/api/v1/titles/?limit=1')
+        assert data['count'] == 1 and counts
+        with mock.patch(
+            'django.core.cache.backends.locmem.time.time',
+            return_value=time.time() + 61,
+        ):
+            data, counts = get(client, '/api/v1/titles/?limit=2')
+        assert counts, (
+            'Проверьте, что закэшированное количество живёт не дольше '
+            'COUNT_CACHE_TIMEOUT'
+        )
@@ -0,0 +1,189 @@
+import json
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api import bulk
+from reviews.models import Category, Genre, Title
+
+URL = '/api/v1/titles/bulk/'
+
+
+def create_catalog():
+    Category.objects.create(name='Фильм', slug='films')
+    Category.objects.create(name='Книга', slug='books')
+    for name, slug in (('Драма', 'drama'), ('Комедия', 'comedy')):
+        Genre.objects.create(name=name, slug=slug)
+
+
+def genres(title_id):
+    return sorted(
+        Title.objects.get(pk=title_id).genre.values_list('slug', flat=True)
+    )
+
+
+class Test28BulkTitles:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_create(self, admin_client):
+        create_catalog()
+        items = [
+            {'name': f'Фильм {i}', 'year': 2000 + i, 'category': 'films',
+             'genre': ['drama', 'comedy'][:i % 2 + 1]}
+            for i in range(10)
+        ]
+        response = admin_client.post(URL, data=items, format='json')
+        assert response.status_code == 201, (
+            'Проверьте, что пакет без ошибок возвращает статус 201'
+        )
+        data = response.json()
+        assert data['created'] == 10 and data['failed'] == 0
+        assert Title.objects.count() == 10
+        for i, result in enumerate(data['results']):
+            title = Title.objects.get(pk=result['id'])
+            assert title.name == f'Фильм {i}', (
+                'Проверьте, что результаты идут в порядке элементов'
+            )
+            assert title.category.slug == 'films'
+            assert genres(title.id) == sorted(
+                ['drama', 'comedy'][:i % 2 + 1]
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_update_and_errors(self, admin_client):
+        create_catalog()
+        title = Title.objects.create(
+            name='Старое', year=1990,
+            category=Category.objects.get(slug='films'),
+        )
+        title.genre.set(Genre.objects.filter(slug='drama'))
+        items = [
+            {'id': title.id, 'name': 'Новое', 'genre': ['comedy'],
+             'category': 'books'},
+            {'name': 'Без жанра', 'year': 2000, 'category': 'music',
+             'genre': ['drama', 'western']},
+            {'name': 'Из будущего', 'year': 3000, 'category': 'films',
+             'genre': []},
+            {'id': 100500, 'name': 'Нет такого'},
+            'не объект',
+        ]
+        response = admin_client.post(URL, data=items, format='json')
+        assert response.status_code == 207, (
+            'Проверьте, что пакет с частью ошибок возвращает статус 207'
+        )
+        data = response.json()
+        assert (data['created'], data['updated'], data['failed']) == (0, 1, 4)
+        results = data['results']
+        assert results[0] == {'id': title.id, 'status': 'updated'}
+        assert set(results[1]['errors']) == {'category', 'genre'}, (
+            'Проверьте, что неизвестные slug-и попадают в ошибки элемента'
+        )
+        assert 'year' in results[2]['errors']
+        assert 'id' in results[3]['errors']
+        assert 'errors' in results[4]
+
+        title.refresh_from_db()
+        assert (title.name, title.year, title.category.slug) == (
+            'Новое', 1990, 'books'
+        ), 'Проверьте, что обновляются только переданные поля'
+        assert genres(title.id) == ['comedy']
+        assert Title.objects.count() == 1
+
+        response = admin_client.post(URL, data=items[1:], format='json')
+        assert response.status_code == 400, (
+            'Проверьте, что пакет только из ошибок возвращает статус 400'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_slug_queries(self, admin_client):
+        create_catalog()
+        titles = [
+            Title.objects.create(name=f'Книга {i}', year=2000)
+            for i in range(20)
+        ]
+        items = [
+            {'id': title.id, 'category': 'books', 'genre': ['drama']}
+            for title in titles
+        ]
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(URL, data=items, format='json')
+        assert response.status_code == 200
+        slug_queries = [
+            query['sql'] for query in context.captured_queries
+            if '"slug"' in query['sql']
+        ]
+        assert len(slug_queries) == 2, (
+            'Проверьте, что slug-и категорий и жанров разрешаются одним '
+            'запросом на весь пакет'
+        )
+        assert len(context.captured_queries) < len(items), (
+            'Проверьте, что обновление пакета не делает запросов '
+            'на каждый элемент'
+        )
+        assert set(Title.objects.values_list('category__slug', flat=True)) \
+            == {'books'}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_permissions(self, user_client, client):
+        items = [{'name': 'Фильм', 'year': 2000, 'category': 'films',
+                  'genre': []}]
+        assert client.post(
+            URL, data=json.dumps(items), content_type='application/json'
+        ).status_code == 401
+        assert user_client.post(URL, data=items, format='json') \
+            .status_code == 403
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_partial_items_keep_other_fields(self, admin_client):
+        create_catalog()
+        first, second = (
+            Title.objects.create(name=f'Фильм {i}', year=2000)
+            for i in range(2)
+        )
+        resolve = bulk.resolve
+
+        def edit_meanwhile(*args):
+            resolved = resolve(*args)
+            # Параллельная правка после чтения произведений пакетом.
+            Title.objects.filter(pk=first.id).update(year=1999)
+            return resolved
+
+        items = [
+            {'id': first.id, 'name': 'Новое'},
+            {'id': second.id, 'year': 2010},
+        ]
+        with mock.patch('api.bulk.resolve', edit_meanwhile):
+            response = admin_client.post(URL, data=items, format='json')
+        assert response.status_code == 200
+        first.refresh_from_db()
+        second.refresh_from_db()
+        assert (first.name, first.year) == ('Новое', 1999), (
+            'Проверьте, что элемент пакета пишет только переданные поля'
+        )
+        assert (second.name, second.year) == ('Фильм 1', 2010)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_create_without_per_item_queries(self, admin_client):
+        create_catalog()
+        Title.objects.create(name='Уже есть', year=2000)
+        items = [
+            {'name': f'Фильм {i}', 'year': 2000, 'category': 'films',
+             'genre': ['drama'] if i % 2 else ['comedy']}
+            for i in range(50)
+        ]
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(URL, data=items, format='json')
+        assert response.status_code == 201
+        assert len(context.captured_queries) < 20, (
+            'Проверьте, что создание пакета не делает запросов '
+            'на каждый элемент'
+        )
+        for item, result in zip(items, response.json()['results']):
+            title = Title.objects.get(pk=result['id'])
+            assert title.name == item['name'], (
+                'Проверьте, что созданным произведениям возвращаются '
+                'их id'
+            )
+            assert genres(title.id) == item['genre']
@@ -0,0 +1,124 @@
+import pytest
+from django.core.cache.backends.db import DatabaseCache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews import slugs, versions
+from reviews.models import Category, Genre, Title
+
+
+def slug_lookups(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if '"slug" =' in query['sql'] or '"slug" IN' in query['sql']
+        or 'FROM "reviews_category"' in query['sql']
+    ]
+
+
+class Test29SlugDirectory:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_no_slug_queries_when_warm(self, admin_client):
+        category = Category.objects.create(name='Фильм', slug='films')
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        title = Title.objects.create(name='Фильм', year=2000,
+                                     category=category)
+        title.genre.set([genre])
+        slugs.genres.load()
+        slugs.categories.load()
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.get(
+                '/api/v1/titles/?category=films&genre=drama'
+            )
+            created = admin_client.post('/api/v1/titles/', data={
+                'name': 'Ещё фильм', 'year': 2001,
+                'category': 'films', 'genre': ['drama'],
+            }, format='json')
+        assert response.status_code == 200 and created.status_code == 201
+        assert response.json()['results'][0]['category'] == {
+            'name': 'Фильм', 'slug': 'films'
+        }
+        assert response.json()['results'][0]['genre'] == [
+            {'name': 'Драма', 'slug': 'drama'}
+        ]
+        assert created.json()['category'] == 'films'
+        assert slug_lookups(context) == [], (
+            'Проверьте, что slug-и жанров и категорий читаются из '
+            'справочника в памяти, а не из базы'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_invalidated_by_writes(self, admin_client):
+        assert slugs.categories.by_slug('books') is None
+        category = Category.objects.create(name='Книга', slug='books')
+        assert slugs.categories.by_slug('books') == category, (
+            'Проверьте, что новая категория сразу видна в справочнике'
+        )
+        category.name = 'Книги'
+        category.save()
+        assert slugs.categories.by_id(category.id).name == 'Книги'
+
+        genre = Genre.objects.create(name='Роман', slug='roman')
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Роман', 'year': 2000,
+            'category': 'books', 'genre': ['roman', 'unknown'],
+        }, format='json')
+        assert response.status_code == 400
+        assert 'genre' in response.json()
+
+        genre.delete()
+        assert slugs.genres.by_slug('roman') is None, (
+            'Проверьте, что удалённый жанр пропадает из справочника'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_write_seen_by_other_workers(self, monkeypatch):
+        # Два процесса сервера: у каждого свой справочник и свой объект
+        # кэша над общей таблицей.
+        first, second = (DatabaseCache('yamdb_cache', {}) for _ in range(2))
+        directory = slugs.SlugDirectory(Category, 'categories')
+        monkeypatch.setattr(versions, 'cache', first)
+        assert directory.by_slug('books') is None
+
+        monkeypatch.setattr(versions, 'cache', second)
+        Category.objects.create(name='Книга', slug='books')
+
+        monkeypatch.setattr(versions, 'cache', first)
+        assert directory.by_slug('books') is not None, (
+            'Проверьте, что запись в одном процессе сбрасывает '
+            'справочник в других'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_version_read_once_per_list(self, client, settings):
+        # Настроенный в проекте кэш - таблица в базе, и каждое чтение
+        # версии - отдельный запрос.
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'yamdb_cache',
+        }}
+        category = Category.objects.create(name='Фильм', slug='films')
+        genres = [
+            Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+            for i in range(3)
+        ]
+        for i in range(30):
+            title = Title.objects.create(
+                name=f'Фильм {i}', year=2000, category=category
+            )
+            title.genre.set(genres)
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/?limit=100')
+        assert response.status_code == 200
+        assert len(response.json()['results']) == 30
+        for resource in ('genres', 'categories'):
+            reads = [
+                query['sql'] for query in context.captured_queries
+                if f'resource-version:{resource}' in query['sql']
+            ]
+            assert len(reads) == 1, (
+                'Проверьте, что версия справочника читается один раз '
+                'на сериализацию, а не для каждого произведения'
+            )
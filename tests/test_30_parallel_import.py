@@ -0,0 +1,169 @@
+import csv
+import os
+import shutil
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.dateparse import parse_datetime
+
+from reviews.management.commands.import_csv import parse_shard, plan_shards
+from reviews.models import Comment, CustomUser, Genre, Review, Title
+from reviews.models import GenreTitle as LegacyGenreTitle
+
+DATA = os.path.join(settings.BASE_DIR, 'static', 'data')
+
+
+def read(name):
+    with open(os.path.join(DATA, name), encoding='utf-8', newline='') as file:
+        return list(csv.DictReader(file))
+
+
+class Test30ParallelImport:
+
+    def test_01_shards_respect_quotes(self):
+        path = os.path.join(DATA, 'review.csv')
+        header, bounds = plan_shards(path, 500)
+        assert len(bounds) > 3
+        rows = []
+        for start, end in bounds:
+            parsed, _, skipped = parse_shard(
+                ('review.csv', path, header, start, end)
+            )
+            assert skipped == 0, (
+                'Проверьте, что граница части не попадает внутрь '
+                'многострочного поля в кавычках'
+            )
+            rows.extend(parsed)
+        expected = read('review.csv')
+        assert [row['id'] for row in rows] == [
+            int(row['id']) for row in expected
+        ]
+        assert [row['text'] for row in rows] == [
+            row['text'] for row in expected
+        ]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_parallel_import(self):
+        call_command(
+            'import_csv', workers=2, shard_bytes=1024, queue_size=2,
+            stdout=StringIO(),
+        )
+        assert CustomUser.objects.count() == len(read('users.csv')), (
+            'Проверьте, что import_csv загружает users.csv'
+        )
+        assert Title.objects.count() == len(read('titles.csv'))
+        assert Review.objects.count() == len(read('review.csv')), (
+            'Проверьте, что отзывы загружаются после пользователей'
+        )
+        assert Comment.objects.count() == len(read('comments.csv'))
+        first = read('review.csv')[0]
+        assert Review.objects.get(pk=first['id']).text == first['text']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_dry_run(self):
+        out = StringIO()
+        call_command(
+            'import_csv', workers=1, dry_run=True, shard_bytes=1024,
+            stdout=out,
+        )
+        assert not CustomUser.objects.exists()
+        assert not Title.objects.exists(), (
+            'Проверьте, что --dry-run ничего не записывает'
+        )
+        assert 'строк/с' in out.getvalue()
+        assert f'review.csv: {len(read("review.csv"))} строк' \
+            in out.getvalue(), (
+                'Проверьте, что --dry-run учитывает зависимости файлов'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_imported_users_need_code(self, client):
+        call_command('import_csv', workers=1, stdout=StringIO())
+        user = CustomUser.objects.get(username='capt_obvious')
+        assert len(user.confirmation_code) == 32, (
+            'Проверьте, что загруженным пользователям выдаётся код '
+            'подтверждения'
+        )
+        for code in ('', None):
+            data = {'username': user.username}
+            if code is not None:
+                data['confirmation_code'] = code
+            response = client.post('/api/v1/auth/token/', data=data)
+            assert response.status_code == 400, (
+                'Проверьте, что без кода подтверждения токен не выдаётся'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_reload_deletes_in_bulk(self):
+        call_command('import_csv', workers=1, stdout=StringIO())
+        with CaptureQueriesContext(connection) as context:
+            call_command('import_csv', workers=1, stdout=StringIO())
+        # Удаление с сигналами сдвигало бы счётчики по каждому отзыву.
+        updates = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "reviews_title"')
+        ]
+        assert len(updates) == 1, (
+            'Проверьте, что повторная загрузка очищает каталог без '
+            'построчного удаления'
+        )
+        assert Review.objects.count() == len(read('review.csv'))
+        title = Title.objects.get(pk=read('review.csv')[0]['title_id'])
+        assert title.reviews_count == Review.objects.filter(
+            title=title
+        ).count()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_unknown_references_skipped(self, tmp_path):
+        path = tmp_path / 'data'
+        shutil.copytree(DATA, path)
+        reviews = read('review.csv')
+        reviews[0]['title_id'] = '999999'
+        with open(path / 'review.csv', 'w', encoding='utf-8',
+                  newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=list(reviews[0]))
+            writer.writeheader()
+            writer.writerows(reviews)
+
+        out = StringIO()
+        call_command('import_csv', path=str(path), workers=1,
+                     chunk_size=7, stdout=out)
+        assert not Review.objects.filter(pk=reviews[0]['id']).exists()
+        assert Review.objects.count() == len(reviews) - 1, (
+            'Проверьте, что отзывы на несуществующие произведения '
+            'пропускаются'
+        )
+        assert 'review.csv: {} строк, пропущено 1'.format(
+            len(reviews) - 1
+        ) in out.getvalue()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_reload_clears_legacy_genre_links(self):
+        call_command('import_csv', workers=1, stdout=StringIO())
+        # Таблицу reviews.GenreTitle заполнял прежний загрузчик.
+        title = Title.objects.first()
+        LegacyGenreTitle.objects.create(
+            title=title, genre=Genre.objects.first()
+        )
+        call_command('import_csv', workers=1, stdout=StringIO())
+        assert not LegacyGenreTitle.objects.exists(), (
+            'Проверьте, что полная загрузка очищает все таблицы, '
+            'ссылающиеся на произведения'
+        )
+        assert Title.objects.count() == len(read('titles.csv'))
+
+    @pytest.mark.django_db(transaction=True)
+    def test_08_dates_from_csv(self):
+        call_command('import_csv', workers=1, stdout=StringIO())
+        for name, model in (('review.csv', Review), ('comments.csv', Comment)):
+            row = read(name)[0]
+            assert model.objects.get(pk=row['id']).pub_date == parse_datetime(
+                row['pub_date']
+            ), (
+                f'Проверьте, что дата из {name} не заменяется временем '
+                'загрузки'
+            )
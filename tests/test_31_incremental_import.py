@@ -0,0 +1,214 @@
+import csv
+import shutil
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.tokens import get_jwt_token
+from reviews.models import (
+    Comment,
+    CustomUser,
+    GenreTitle,
+    ImportRowHash,
+    LeaderboardEntry,
+    Review,
+    Title,
+)
+from reviews.ratings import drifted_reviews, drifted_titles
+
+
+def read(path):
+    with open(path, encoding='utf-8', newline='') as file:
+        return list(csv.DictReader(file))
+
+
+def rewrite(path, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def import_csv(path, **options):
+    out = StringIO()
+    call_command(
+        'import_csv', path=str(path), workers=1, stdout=out, **options
+    )
+    return out.getvalue()
+
+
+@pytest.fixture
+def data(tmp_path):
+    path = tmp_path / 'data'
+    shutil.copytree(f'{settings.BASE_DIR}/static/data', path)
+    import_csv(path)
+    return path
+
+
+def writes(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].split()[0] in ('INSERT', 'UPDATE', 'DELETE')
+    ]
+
+
+class Test31IncrementalImport:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_applies_only_diff(self, data):
+        titles = set(Title.objects.values_list('id', flat=True))
+        reviews = read(data / 'review.csv')
+        changed, removed = reviews[0], reviews[-1]
+        assert not Comment.objects.filter(review_id=removed['id']).exists()
+        changed['score'] = '1' if changed['score'] != '1' else '2'
+        used = {(row['title_id'], row['author']) for row in reviews}
+        title_id, author = next(
+            (title, user['id'])
+            for title in sorted({row['title_id'] for row in reviews})
+            for user in read(data / 'users.csv')
+            if (title, user['id']) not in used
+        )
+        added = dict(changed, id='100000', title_id=title_id,
+                     author=author, score='7', text='Новый отзыв')
+        rewrite(data / 'review.csv', reviews[:-1] + [added])
+        title_rows = read(data / 'titles.csv')
+        title_rows[1]['name'] = 'Новое название'
+        rewrite(data / 'titles.csv', title_rows)
+
+        out = import_csv(data, incremental=True)
+        assert set(Title.objects.values_list('id', flat=True)) == titles, (
+            'Проверьте, что --incremental не очищает каталог'
+        )
+        assert Review.objects.get(pk=changed['id']).score == int(
+            changed['score']
+        )
+        assert Review.objects.get(pk=100000).text == 'Новый отзыв'
+        assert not Review.objects.filter(pk=removed['id']).exists(), (
+            'Проверьте, что строки, пропавшие из файла, удаляются'
+        )
+        assert Title.objects.get(pk=title_rows[1]['id']).name == (
+            'Новое название'
+        )
+        assert not drifted_titles(Title.objects.all()).exists(), (
+            'Проверьте, что рейтинги затронутых произведений пересчитаны'
+        )
+        assert 'review.csv: 2 строк' in out and 'удалено 1' in out
+
+        with CaptureQueriesContext(connection) as context:
+            out = import_csv(data, incremental=True)
+        assert writes(context) == [], (
+            'Проверьте, что повторный запуск без изменений ничего '
+            'не записывает'
+        )
+        assert 'review.csv: 0 строк' in out
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_rows_without_hashes(self, data):
+        ImportRowHash.objects.all().delete()
+        count = Title.objects.count()
+        title_rows = read(data / 'titles.csv')
+        title_rows[2]['name'] = 'Другое название'
+        rewrite(data / 'titles.csv', title_rows)
+
+        import_csv(data, incremental=True)
+        assert Title.objects.count() == count
+        assert Title.objects.get(pk=title_rows[2]['id']).name == (
+            'Другое название'
+        ), 'Проверьте, что строки без сумм обновляются, а не вставляются'
+        assert ImportRowHash.objects.filter(source='titles.csv').count() \
+            == len(title_rows)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_updated_review_etag(self, data, client):
+        reviews = read(data / 'review.csv')
+        review = reviews[0]
+        url = (
+            f'/api/v1/titles/{review["title_id"]}/reviews/{review["id"]}/'
+        )
+        etag = client.get(url)['ETag']
+        review['text'] = 'Исправленный текст'
+        rewrite(data / 'review.csv', reviews)
+
+        import_csv(data, incremental=True)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что обновлённый загрузкой отзыв получает новый ETag'
+        )
+        assert response.json()['text'] == 'Исправленный текст'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_role_change_revokes_tokens(self, data):
+        users = read(data / 'users.csv')
+        row = next(user for user in users if user['role'] == 'admin')
+        token = get_jwt_token(CustomUser.objects.get(pk=row['id']))['token']
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        assert client.get('/api/v1/users/').status_code == 200
+        row['role'] = 'user'
+        rewrite(data / 'users.csv', users)
+
+        import_csv(data, incremental=True)
+        assert CustomUser.objects.get(pk=row['id']).role == 'user'
+        assert client.get('/api/v1/users/').status_code == 401, (
+            'Проверьте, что смена роли загрузкой отзывает токены'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_removed_rows_cascade_in_bulk(self, data):
+        titles = read(data / 'titles.csv')
+        reviews = read(data / 'review.csv')
+        comments = read(data / 'comments.csv')
+        counts = {}
+        for review in reviews:
+            counts[review['title_id']] = counts.get(review['title_id'], 0) + 1
+        title = max(titles, key=lambda row: counts.get(row['id'], 0))
+        users = read(data / 'users.csv')
+        user = next(
+            row for row in users
+            if any(comment['author'] == row['id'] for comment in comments)
+            and any(review['author'] == row['id'] for review in reviews)
+        )
+        cascaded = Review.objects.filter(
+            Q(title_id=title['id']) | Q(author_id=user['id'])
+        ).count() + Comment.objects.filter(
+            Q(review__title_id=title['id']) | Q(author_id=user['id'])
+            | Q(review__author_id=user['id'])
+        ).count()
+        rewrite(data / 'titles.csv', [row for row in titles if row != title])
+        rewrite(data / 'users.csv', [row for row in users if row != user])
+
+        with CaptureQueriesContext(connection) as context:
+            import_csv(data, incremental=True)
+        # Рейтинги лучших пересобираются один раз, rebuild_all.
+        catalog = [
+            sql for sql in writes(context)
+            if 'reviews_leaderboardentry' not in sql
+        ]
+        assert len(catalog) < cascaded, (
+            'Проверьте, что удалённые из файла строки и ссылающиеся на них '
+            'удаляются пакетно, без сигналов на каждую строку'
+        )
+        title_id, user_id = int(title['id']), int(user['id'])
+        assert not Title.objects.filter(pk=title_id).exists()
+        assert not CustomUser.objects.filter(pk=user_id).exists()
+        for model, lookup in (
+            (Review, {'title_id': title_id}),
+            (Title.genre.through, {'title_id': title_id}),
+            (GenreTitle, {'title_id': title_id}),
+            (LeaderboardEntry, {'title_id': title_id}),
+            (Review, {'author_id': user_id}),
+            (Comment, {'author_id': user_id}),
+        ):
+            assert not model.objects.filter(**lookup).exists(), (
+                'Проверьте, что ссылающиеся строки удаляются каскадом'
+            )
+        assert not drifted_titles(Title.objects.all()).exists()
+        assert not drifted_reviews(Review.objects.all()).exists(), (
+            'Проверьте, что счётчики пересчитаны после удаления'
+        )